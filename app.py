@@ -1,11 +1,37 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
 
+def show_profiler_panel():
+    """Sidebar summary of recorded stage timings with JSON/CSV export"""
+    from profiling import (summarize, clear_history, export_json, export_csv,
+                           set_memory_tracking, is_memory_tracking)
+    
+    with st.sidebar.expander("Profiler", expanded=True):
+        track_memory = st.checkbox(
+            "Track peak memory",
+            value=is_memory_tracking(),
+            help="Uses tracemalloc, which slows allocation-heavy stages. Stages that "
+                 "overlap stages of other sessions record no peak."
+        )
+        set_memory_tracking(track_memory)
+        
+        summary = summarize()
+        if summary.empty:
+            st.caption("No stages recorded yet.")
+            return
+        st.dataframe(
+            summary[['calls', 'mean_wall_ms', 'p95_wall_ms', 'mean_cpu_ms', 'max_peak_kb']].round(1),
+            use_container_width=True
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("JSON", export_json(), file_name="profile.json", mime="application/json")
+        with col2:
+            st.download_button("CSV", export_csv(), file_name="profile.csv", mime="text/csv")
+        if st.button("Clear history"):
+            clear_history()
+
 def main():
     # Set page config must be the first Streamlit command
     st.set_page_config(
@@ -19,52 +45,56 @@ def main():
     if current_dir not in sys.path:
         sys.path.append(current_dir)
 
-    # Import local modules after path setup
+    # Import local modules after path setup; pages import their own
+    # (heavy) dependencies only when first selected
     from data_utils import load_nepal_climate_data, extract_features, prepare_features_for_model
-    from visualizations import plot_prediction_history, plot_climate_timeseries, plot_yearly_trend, plot_seasonal_patterns
+    from pages import PAGES, get_page, get_page_inputs
+    from profiling import profile_stage
+    from task_graph import TaskGraph
 
     # Sidebar
     st.sidebar.title("Navigation")
     page = st.sidebar.radio(
         "Select a Page",
-        ["Overview", "Data Analysis", "Trends & Patterns", "Predictions", "About"]
+        list(PAGES)
+    )
+
+    # Long time series are downsampled to the chart width unless this is set
+    st.sidebar.checkbox(
+        "Full-resolution charts",
+        key='full_resolution_charts',
+        help="Draw every point of long time series, e.g. to zoom into a short period"
     )
 
     # Title and description
     st.title(" Nepal Climate Analysis")
 
-    # Load data
+    # Each artifact is computed only if the selected page needs it; the page
+    # module is imported while the data loads
+    graph = TaskGraph()
+    graph.add('climate_data', load_nepal_climate_data)
+    graph.add('features', lambda climate_data: None if climate_data is None else extract_features(climate_data),
+              inputs=['climate_data'])
+    graph.add('model_inputs', lambda features: None if features is None else prepare_features_for_model(features),
+              inputs=['features'])
+    graph.add('page', lambda: get_page(page))
+    
+    page_inputs = get_page_inputs(page)
     with st.spinner('Loading climate data...'):
-        climate_data = load_nepal_climate_data()
+        try:
+            artifacts = graph.get('page', *page_inputs)
+        except ImportError as e:
+            st.error(f"Error importing the {page} page: {str(e)}")
+            st.info("Current Python path: " + str(sys.path))
+            artifacts = None
         
-        if climate_data is not None:
-            # Process features
-            features = extract_features(climate_data)
-            X, y = prepare_features_for_model(features)
-            
-            if page == "Overview":
-                from pages.overview import show_overview
-                show_overview(climate_data)
-                
-            elif page == "Data Analysis":
-                from pages.data_analysis import show_data_analysis
-                show_data_analysis(climate_data, features)
-           
-            elif page == "Trends & Patterns":
-                try:
-                    from pages.trend_pattern import show_trend_pattern
-                    show_trend_pattern(climate_data, features)
-                except ImportError as e:
-                    st.error(f"Error importing trend pattern module: {str(e)}")
-                    st.info("Current Python path: " + str(sys.path))
-                    
-            elif page == "Predictions":
-                from pages.prediction import show_prediction
-                show_prediction(climate_data, features)
-                
-            elif page == "About":
-                from pages.about import show_about
-                show_about()
+        if artifacts is not None and all(artifacts[name] is not None for name in page_inputs):
+            with profile_stage(f'page.{page}'):
+                artifacts['page'](*[artifacts[name] for name in page_inputs])
+
+    # Optional per-stage timings, drawn last so this run's stages are included
+    if st.sidebar.checkbox("Show profiler", key='show_profiler'):
+        show_profiler_panel()
 
     # Footer
     st.markdown("---")
@@ -0,0 +1,92 @@
+"""
+Report per-page import cost and cold-start time in fresh interpreters.
+
+For every page, a new Python process imports the app and the page module
+with -X importtime. The report shows the total import time, the slowest
+top-level packages and which heavy stacks were pulled in. Light pages
+(About by default) must stay under --budget-ms and must not import any
+of HEAVY_MODULES; the script exits non-zero when they do.
+
+Usage:
+    python benchmarks/bench_cold_start.py --top 8 --budget-ms 1500
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pages import PAGES
+
+# Stacks that only the pages needing them should import (plotly is not
+# listed: streamlit imports it itself to register its chart theme)
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'sklearn', 'statsmodels', 'folium', 'rasterio', 'scipy']
+
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(module):
+    """
+    Import app and then module in a fresh interpreter
+
+    Returns:
+        tuple: (process wall time s, page import time ms, {module: cumulative us}
+               of everything imported, [(cumulative us, name)] of the page's direct imports)
+    """
+    # A plain import statement: importlib.import_module bypasses -X importtime
+    code = f"import app; import {module}"
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    # Nesting adds two spaces of indent per level; depth 1 is imported by the -c code
+    entries = [(int(cum_us), (len(indent) - 1) // 2 + 1, name)
+               for _, cum_us, indent, name in LINE.findall(result.stderr)]
+    cumulative = {name: cum_us for cum_us, _, name in entries}
+
+    # Modules are reported when they finish loading, so everything after the
+    # app entry was imported for the page
+    after_app = next(i for i, (_, depth, name) in enumerate(entries) if depth == 1 and name == 'app') + 1
+    page_entries = entries[after_app:]
+    page_ms = sum(cum_us for cum_us, depth, _ in page_entries if depth == 1) / 1000
+    # Direct imports of the page module, which sits at depth 1
+    direct = sorted(((cum_us, name) for cum_us, depth, name in page_entries if depth == 2), reverse=True)
+    return wall, page_ms, cumulative, direct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--top', type=int, default=8, help='slowest packages shown per page')
+    parser.add_argument('--budget-ms', type=float, default=1500, help='import budget of light pages')
+    parser.add_argument('--light-pages', nargs='+', default=['About'])
+    args = parser.parse_args()
+
+    failures = []
+    for page, (module, _, _) in PAGES.items():
+        wall, page_ms, cumulative, direct = import_profile(module)
+        heavy = [name for name in HEAVY_MODULES if name in cumulative]
+
+        print(f"{page:<18} process={wall * 1000:7.0f} ms  page imports={page_ms:7.0f} ms  "
+              f"heavy={','.join(heavy) or '-'}")
+        for us, name in direct[:args.top]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+        if page in args.light_pages:
+            if heavy:
+                failures.append(f"{page} imports {', '.join(heavy)}")
+            if page_ms > args.budget_ms:
+                failures.append(f"{page} imports take {page_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Render the matplotlib figures from a thread pool and check memory stays flat.
+
+Each round renders every plot in visualizations.py many times concurrently,
+compares the PNGs with a serial reference render and reports the traced
+memory after the round; a leak or shared pyplot state shows up as growing
+memory or mismatching images.
+
+Usage:
+    python benchmarks/bench_concurrent_render.py --workers 8 --renders 40 --rounds 4
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visualizations import (
+    plot_climate_timeseries, plot_seasonal_patterns, plot_yearly_trend,
+    plot_actual_vs_predicted, plot_prediction_history, figure_to_png
+)
+
+
+def sample_data(n_years=30, seed=0):
+    rng = np.random.default_rng(seed)
+    years = np.repeat(np.arange(1990, 1990 + n_years), 12)
+    months = np.tile(np.arange(1, 13), n_years)
+    temperature = 20 + 6 * np.sin((months - 4) / 12 * 2 * np.pi) + rng.normal(0, 1, len(years))
+    precipitation = np.clip(150 + 120 * np.sin((months - 4) / 12 * 2 * np.pi) + rng.normal(0, 20, len(years)), 0, None)
+    return pd.DataFrame({'year': years, 'month': months,
+                         'temperature': temperature, 'precipitation': precipitation})
+
+
+def make_jobs(data):
+    actual = data[['temperature', 'precipitation']]
+    predicted = actual + 0.5
+    return {
+        'timeseries': lambda: plot_climate_timeseries(data),
+        'seasonal': lambda: plot_seasonal_patterns(data),
+        'yearly': lambda: plot_yearly_trend(data),
+        'actual_vs_predicted': lambda: plot_actual_vs_predicted(actual, predicted),
+        'prediction_history': lambda: plot_prediction_history(
+            actual['temperature'], predicted['temperature'],
+            actual['precipitation'], predicted['precipitation']
+        ),
+    }
+
+
+def render(job):
+    return figure_to_png(job(), dpi=50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--renders', type=int, default=40, help='renders per round')
+    parser.add_argument('--rounds', type=int, default=4)
+    args = parser.parse_args()
+
+    jobs = make_jobs(sample_data())
+    names = list(jobs)
+    reference = {name: render(jobs[name]) for name in names}
+
+    tracemalloc.start()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for round_index in range(args.rounds):
+            batch = [names[i % len(names)] for i in range(args.renders)]
+            start = time.perf_counter()
+            images = list(pool.map(lambda name: render(jobs[name]), batch))
+            elapsed = time.perf_counter() - start
+
+            mismatches = sum(image != reference[name] for name, image in zip(batch, images))
+            del images
+            gc.collect()
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"round={round_index}  renders={len(batch)}  time={elapsed:6.2f} s  "
+                  f"mismatches={mismatches}  traced={current / 1e6:7.1f} MB  peak={peak / 1e6:7.1f} MB")
+            tracemalloc.reset_peak()
+
+
+if __name__ == '__main__':
+    main()
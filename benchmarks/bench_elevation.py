@@ -0,0 +1,87 @@
+"""
+Benchmark NepalMapVisualizer.generate_elevation_data at several resolutions.
+
+The original per-cell implementation is included as a reference and run at
+coarse resolutions to compare timings and elevation statistics over the
+cells inside the country mask.
+
+Usage:
+    python benchmarks/bench_elevation.py --resolutions 0.05 0.02 0.01 0.005 0.001
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from map_utils import NepalMapVisualizer
+
+
+def legacy_elevation_data(viz):
+    """Original nested-loop terrain synthesis, kept for comparison"""
+    lats, lons = viz.get_grid_axes()
+    elevation = np.zeros((len(lats), len(lons)))
+    
+    for i, lat in enumerate(lats):
+        for j, lon in enumerate(lons):
+            region = None
+            for reg_data in viz.regions.values():
+                if reg_data['bounds']['south'] <= lat < reg_data['bounds']['north']:
+                    region = reg_data
+                    break
+            if region:
+                variation = np.random.normal(0, region['variation'])
+                ew_variation = 500 * (1 - abs(lon - 84.0) / 4.0)
+                elevation[i, j] = region['base_elevation'] + variation + ew_variation
+    
+    for valley in viz.river_valleys:
+        for i, lat in enumerate(lats):
+            for j, lon in enumerate(lons):
+                min_dist = float('inf')
+                for path_lat, path_lon in valley['path']:
+                    min_dist = min(min_dist, np.sqrt((lat - path_lat)**2 + (lon - path_lon)**2))
+                if min_dist < valley['width']:
+                    elevation[i, j] -= valley['depth'] * np.exp(-(min_dist / valley['width'])**2)
+    
+    elevation += np.random.normal(0, 100, elevation.shape)
+    return np.clip(elevation, 50, 8848)
+
+
+def describe(elevation):
+    elevation = elevation[np.isfinite(elevation)]
+    p5, p50, p95 = np.percentile(elevation, [5, 50, 95])
+    return f"mean={elevation.mean():7.1f} std={elevation.std():7.1f} p5={p5:7.1f} p50={p50:7.1f} p95={p95:7.1f}"
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resolutions', type=float, nargs='+',
+                        default=[0.05, 0.02, 0.01, 0.005, 0.002, 0.001])
+    parser.add_argument('--legacy-max-cells', type=int, default=100_000,
+                        help='largest grid on which the slow reference is run')
+    args = parser.parse_args()
+    
+    for resolution in args.resolutions:
+        viz = NepalMapVisualizer(resolution=resolution)
+        n_cells = np.prod([len(axis) for axis in viz.get_grid_axes()])
+        
+        elapsed, elevation = time_call(viz.generate_elevation_data)
+        print(f"res={resolution:<6} cells={n_cells:>10,} vectorized={elapsed * 1000:9.1f} ms  {describe(elevation)}")
+        
+        if n_cells <= args.legacy_max_cells:
+            elapsed, elevation = time_call(legacy_elevation_data, viz)
+            elevation = np.where(viz.country_mask, elevation, np.nan)  # compare the same cells
+            print(f"{'':<21}           legacy={elapsed * 1000:9.1f} ms  {describe(elevation)}")
+
+
+if __name__ == '__main__':
+    main()
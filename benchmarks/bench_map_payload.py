@@ -0,0 +1,42 @@
+"""
+Compare interactive map payload size and build time across raster layer modes.
+
+Usage:
+    python benchmarks/bench_map_payload.py --resolutions 0.02 0.01 0.005
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from map_utils import NepalMapVisualizer
+from city_data import CITY_DATA
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resolutions', type=float, nargs='+', default=[0.02, 0.01, 0.005])
+    parser.add_argument('--modes', nargs='+', default=['image', 'tiles', 'contours'])
+    args = parser.parse_args()
+    
+    cities_data = {city: {**info, 'temperature': 20.0} for city, info in CITY_DATA.items()}
+    
+    for resolution in args.resolutions:
+        viz = NepalMapVisualizer(resolution=resolution)
+        elevation = viz.elevation_data
+        temperature = viz.generate_temperature_raster(20.0, elevation)
+        
+        for mode in args.modes:
+            start = time.perf_counter()
+            m = viz.create_interactive_map(cities_data, elevation, temperature, 2025, layer_mode=mode)
+            html = m._repr_html_()
+            elapsed = time.perf_counter() - start
+            print(f"res={resolution:<6} mode={mode:<9} payload={len(html.encode()) / 1024:9.1f} KB  "
+                  f"build={elapsed * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import os
+import sys
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Root directory for on-disk caches (forecast store, grids, tiles, ...)
+CACHE_DIR = os.environ.get(
+    'CLIMATE_APP_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+def get_cache_dir(*parts):
+    """Returns a directory under the application cache, creating it if needed"""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def hash_dataframe(df):
+    """Returns a stable hex digest of a DataFrame's columns and values"""
+    digest = hashlib.sha1()
+    digest.update(','.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def hash_array(array):
+    """Returns a hex digest of an array's shape, dtype and values"""
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1(f'{array.shape}{array.dtype}'.encode())
+    digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count and,
+    optionally, total size in bytes
+    
+    With a spill_dir, evicted entries are pickled to disk and promoted back
+    into memory on their next lookup, which removes their file. The oldest
+    files are deleted once the directory holds more than max_spill_bytes.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=None, spill_dir=None,
+                 max_spill_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def _size_of(value):
+        if isinstance(value, (bytes, bytearray, str)):
+            return len(value)
+        return sys.getsizeof(value)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode()).hexdigest() + '.pkl')
+
+    def _load_spilled(self, key):
+        try:
+            with open(self._spill_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _discard_spilled(self, key):
+        try:
+            os.remove(self._spill_path(key))
+        except OSError:
+            pass
+
+    def _trim_spill_dir(self):
+        # Scanned rather than tracked: files may outlive the process or come from others
+        files = []
+        for entry in os.scandir(self.spill_dir):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_spill_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or
+            (self.max_bytes is not None and self._total_bytes > self.max_bytes and len(self._entries) > 1)
+        ):
+            key, value = self._entries.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(key)
+            if self.spill_dir:
+                path = self._spill_path(key)
+                tmp_path = f'{path}.{threading.get_ident()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+                if self.max_spill_bytes is not None:
+                    self._trim_spill_dir()
+
+    def _store(self, key, value, size=None):
+        if key in self._entries:
+            self._total_bytes -= self._sizes[key]
+        elif self.spill_dir:
+            # The value in memory supersedes any spilled copy
+            self._discard_spilled(key)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = self._size_of(value) if size is None else int(size)
+        self._total_bytes += self._sizes[key]
+        self._evict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if self.spill_dir:
+                value = self._load_spilled(key)
+                if value is not None:
+                    self._store(key, value)
+                    return value
+            return default
+
+    def put(self, key, value, size=None):
+        """Store a value; size (bytes) overrides the default estimate, which only sees the outer object"""
+        with self._lock:
+            self._store(key, value, size)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        """Approximate size of the in-memory entries"""
+        return self._total_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
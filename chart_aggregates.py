@@ -0,0 +1,178 @@
+import numpy as np
+import plotly.graph_objects as go
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+def histogram_trace(values, nbins=30, name=None, color=None):
+    """
+    Creates a bar trace from bins counted on the server, so the chart carries
+    nbins bars however many observations there are
+
+    Args:
+        values (array-like): Observations
+        nbins (int): Number of equal-width bins
+        name (str, optional): Trace name
+        color (str, optional): Bar color
+
+    Returns:
+        plotly.graph_objects.Bar: Bars at the bin centres with the bin edges in the hover text
+    """
+    values = _finite(values)
+    counts, edges = np.histogram(values, bins=nbins) if len(values) else (np.zeros(nbins, dtype=int), np.linspace(0, 1, nbins + 1))
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate='%{customdata[0]:.2f} – %{customdata[1]:.2f}<br>Count: %{y}<extra></extra>',
+        name=name,
+        marker_color=color
+    )
+
+def box_stats(values, whisker=1.5):
+    """
+    Quartiles, Tukey fences and outliers of a sample
+
+    Args:
+        values (array-like): Observations
+        whisker (float): Fence distance in interquartile ranges
+
+    Returns:
+        dict: q1, median, q3, lowerfence, upperfence, mean and outliers (np.ndarray)
+    """
+    values = _finite(values)
+    if not len(values):
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whisker * iqr) & (values <= q3 + whisker * iqr)]
+    return {
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        # Whiskers end at the most extreme observations inside the fences
+        'lowerfence': inside.min(),
+        'upperfence': inside.max(),
+        'mean': values.mean(),
+        'outliers': values[(values < inside.min()) | (values > inside.max())]
+    }
+
+def box_traces(data, x, y, max_outliers=50, name=None, color=None):
+    """
+    Creates a box plot from quartiles computed on the server, one box per
+    category of x, with at most max_outliers outlier points per box
+
+    Args:
+        data (pd.DataFrame): Source data
+        x (str): Category column
+        y (str): Value column
+        max_outliers (int): Outliers drawn per box, spread evenly over their sorted values
+        name (str, optional): Trace name
+        color (str, optional): Box color
+
+    Returns:
+        list: A go.Box trace with precomputed statistics and a go.Scatter of outliers
+    """
+    groups = data.groupby(x, observed=True, sort=True)[y]
+    categories, stats = [], []
+    for category, values in groups:
+        summary = box_stats(values.to_numpy())
+        if summary is not None:
+            categories.append(category)
+            stats.append(summary)
+
+    box = go.Box(
+        x=categories,
+        q1=[s['q1'] for s in stats],
+        median=[s['median'] for s in stats],
+        q3=[s['q3'] for s in stats],
+        lowerfence=[s['lowerfence'] for s in stats],
+        upperfence=[s['upperfence'] for s in stats],
+        mean=[s['mean'] for s in stats],
+        name=name or y,
+        marker_color=color,
+        showlegend=False
+    )
+
+    outlier_x, outlier_y = [], []
+    for category, summary in zip(categories, stats):
+        outliers = np.sort(summary['outliers'])
+        if len(outliers) > max_outliers:
+            outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(int)]
+        outlier_x.extend([category] * len(outliers))
+        outlier_y.extend(outliers)
+    points = go.Scatter(
+        x=outlier_x,
+        y=outlier_y,
+        mode='markers',
+        marker=dict(color=color, size=5),
+        name='Outliers',
+        showlegend=False
+    )
+    return [box, points]
+
+def binned_scatter_traces(x_values, y_values, max_points=2000, bins=60, name=None, color=None,
+                          trendline=True, hover_text=None):
+    """
+    Creates scatter traces whose size is bounded regardless of the number of
+    observations: up to max_points raw points, otherwise one marker per
+    occupied cell of a bins x bins grid, sized by its count. The trendline is
+    an ordinary least-squares fit over all observations.
+
+    Args:
+        x_values (array-like): X observations
+        y_values (array-like): Y observations
+        max_points (int): Largest sample drawn point by point
+        bins (int): Grid cells per axis when binning
+        name (str, optional): Trace name
+        color (str, optional): Marker color
+        trendline (bool): Add the OLS trendline
+        hover_text (array-like, optional): Label of each observation, shown when drawn point by point
+
+    Returns:
+        list: Scatter traces (points or bins, then the trendline)
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    keep = np.isfinite(x_values) & np.isfinite(y_values)
+    x_values, y_values = x_values[keep], y_values[keep]
+
+    if len(x_values) <= max_points:
+        text = None if hover_text is None else np.asarray(hover_text)[keep]
+        traces = [go.Scatter(x=x_values, y=y_values, mode='markers', name=name, text=text,
+                             marker=dict(color=color))]
+    else:
+        counts, x_edges, y_edges = np.histogram2d(x_values, y_values, bins=bins)
+        # Mean position of the observations in each occupied cell
+        x_sums = np.histogram2d(x_values, y_values, bins=[x_edges, y_edges], weights=x_values)[0]
+        y_sums = np.histogram2d(x_values, y_values, bins=[x_edges, y_edges], weights=y_values)[0]
+        occupied = counts > 0
+        n = counts[occupied]
+        traces = [go.Scatter(
+            x=x_sums[occupied] / n,
+            y=y_sums[occupied] / n,
+            mode='markers',
+            name=name,
+            customdata=n,
+            hovertemplate='x: %{x:.2f}<br>y: %{y:.2f}<br>Observations: %{customdata}<extra></extra>',
+            marker=dict(color=color, size=4 + 12 * np.sqrt(n / n.max()), opacity=0.7)
+        )]
+
+    if trendline and len(x_values) > 1 and np.ptp(x_values) > 0:
+        slope, intercept = np.polyfit(x_values, y_values, 1)
+        fitted = slope * x_values + intercept
+        ss_res = np.sum((y_values - fitted) ** 2)
+        ss_tot = np.sum((y_values - y_values.mean()) ** 2)
+        r_squared = 1 - ss_res / ss_tot if ss_tot > 0 else np.nan
+        x_line = np.array([x_values.min(), x_values.max()])
+        traces.append(go.Scatter(
+            x=x_line,
+            y=slope * x_line + intercept,
+            mode='lines',
+            name='OLS trend',
+            line=dict(color=color),
+            hovertemplate=f'y = {slope:.3f}x + {intercept:.3f}<br>R² = {r_squared:.3f}<extra></extra>',
+            showlegend=False
+        ))
+    return traces
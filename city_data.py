@@ -1,5 +1,7 @@
+import os
 import pandas as pd
 import numpy as np
+from station_registry import StationRegistry
 
 # City coordinates and elevation data
 CITY_DATA = {
@@ -35,11 +37,48 @@ CITY_DATA = {
     }
 }
 
+_station_registry = None
+
+def get_station_registry():
+    """
+    Returns the shared station registry, loaded from the file named by the
+    CLIMATE_APP_STATIONS environment variable or built from CITY_DATA
+    """
+    global _station_registry
+    if _station_registry is None:
+        stations_file = os.environ.get('CLIMATE_APP_STATIONS')
+        if stations_file:
+            registry = StationRegistry.from_file(stations_file)
+        else:
+            registry = StationRegistry.from_dict(CITY_DATA)
+        _station_registry = fill_station_elevations(registry)
+    return _station_registry
+
+def fill_station_elevations(registry):
+    """
+    Sample missing station elevations from the elevation grid
+    
+    Temperatures are derived from elevation, so stations the grid does not
+    cover are rejected rather than left without one.
+    
+    Raises:
+        ValueError: If a station's elevation is still unknown
+    """
+    if registry.table['elevation'].isna().any():
+        # Imported on demand: station files usually list every elevation
+        from map_utils import NepalMapVisualizer
+        map_viz = NepalMapVisualizer()
+        if map_viz.elevation_data is not None:
+            registry.fill_elevation(map_viz.sample_elevation)
+    
+    unknown = registry.table.index[registry.table['elevation'].isna()].tolist()
+    if unknown:
+        raise ValueError(f"Stations outside the elevation grid need an elevation: {unknown}")
+    return registry
+
 def get_city_coordinates():
     """Returns a DataFrame with city coordinates"""
-    cities_df = pd.DataFrame.from_dict(CITY_DATA, orient='index')
-    cities_df.index.name = 'city'
-    return cities_df
+    return get_station_registry().table.copy()
 
 def adjust_temperature_by_elevation(base_temp, elevation):
     """Adjust temperature based on elevation (lapse rate of 6.5°C per 1000m)"""
@@ -49,12 +88,12 @@ def adjust_temperature_by_elevation(base_temp, elevation):
 
 def generate_city_temperatures(base_data, city_name):
     """Generate temperature data for a specific city based on base data and elevation"""
-    city_info = CITY_DATA[city_name]
+    city_info = get_station_registry().get(city_name)
     city_data = base_data.copy()
     
     # Adjust temperatures based on elevation
-    city_data['temperature'] = city_data['temperature'].apply(
-        lambda x: adjust_temperature_by_elevation(x, city_info['elevation'])
+    city_data['temperature'] = adjust_temperature_by_elevation(
+        city_data['temperature'], city_info['elevation']
     )
     
     # Add city information
@@ -62,6 +101,34 @@ def generate_city_temperatures(base_data, city_name):
     city_data['lat'] = city_info['lat']
     city_data['lon'] = city_info['lon']
     city_data['elevation'] = city_info['elevation']
-    city_data['region'] = city_info['region']
+    city_data['region'] = city_info.get('region')
+    
+    return city_data
+
+def generate_all_city_temperatures(base_data, cities=None):
+    """
+    Generate long-format (city, year, temperature) data for many cities at once
+    
+    Args:
+        base_data (pd.DataFrame): Base series with 'year' and 'temperature' columns
+        cities (pd.DataFrame, optional): City table indexed by city name with an
+                                         'elevation' column, defaults to all known cities
+    """
+    if cities is None:
+        cities = get_station_registry().table
+    
+    years = base_data['year'].to_numpy()
+    base_temps = base_data['temperature'].to_numpy(dtype=float)
+    elevations = cities['elevation'].to_numpy(dtype=float)
+    
+    # One (cities x years) broadcast instead of a copy per city
+    temperatures = adjust_temperature_by_elevation(base_temps[None, :], elevations[:, None])
+    n_cities, n_years = temperatures.shape
     
-    return city_data 
\ No newline at end of file
+    return pd.DataFrame({
+        'city': pd.Categorical.from_codes(
+            np.repeat(np.arange(n_cities), n_years), categories=cities.index
+        ),
+        'year': np.tile(years, n_cities),
+        'temperature': temperatures.ravel()
+    })
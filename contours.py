@@ -0,0 +1,203 @@
+import math
+import warnings
+import numpy as np
+
+# Cell corners in counter-clockwise order (row offset, col offset), and edge k
+# joins corner k to corner k + 1: 0 = bottom, 1 = right, 2 = top, 3 = left
+CORNERS = [(0, 0), (0, 1), (1, 1), (1, 0)]
+
+def _build_segment_table():
+    """
+    Oriented segments for each marching-squares case, as (from edge, to edge)
+    pairs that keep values above the level on the left. Rows 16 and 17 are
+    the saddle cases 5 and 10 when the cell center is above the level.
+    """
+    table = np.full((18, 2, 2), -1, dtype=np.int8)
+    for case in range(16):
+        above = [bool(case >> k & 1) for k in range(4)]
+        if case in (5, 10):
+            # Saddle: either the above corners or the below corners are isolated
+            table[case] = [[k, (k - 1) % 4] for k in range(4) if above[k]]
+            table[case + 11 if case == 5 else 17] = [[(k - 1) % 4, k] for k in range(4) if not above[k]]
+        elif 0 < sum(above) < 4:
+            start = next(k for k in range(4) if above[k] and not above[k - 1])
+            end = start
+            while above[(end + 1) % 4]:
+                end = (end + 1) % 4
+            table[case, 0] = [end, (start - 1) % 4]
+    return table
+
+SEGMENT_TABLE = _build_segment_table()
+
+def marching_squares(data, level):
+    """
+    Trace the closed boundaries of the region where data >= level
+    
+    The grid is padded with values below the level so every contour closes;
+    NaN cells count as below the level.
+    
+    Returns:
+        list of np.ndarray: Rings of fractional (row, col) grid coordinates,
+                            counter-clockwise around the region above the level
+    """
+    values = np.asarray(data, dtype=np.float64)
+    low = level - 1.0
+    values = np.pad(np.where(np.isfinite(values), values, low), 1, constant_values=low)
+    n_rows, n_cols = values.shape
+    
+    above = values >= level
+    a, b, c, d = (above[dr:n_rows - 1 + dr, dc:n_cols - 1 + dc] for dr, dc in CORNERS)
+    cases = (a * 1 + b * 2 + c * 4 + d * 8).astype(np.intp)
+    
+    # Resolve saddles by the cell-center average
+    center = (values[:-1, :-1] + values[:-1, 1:] + values[1:, 1:] + values[1:, :-1]) / 4
+    cases[(cases == 5) & (center >= level)] = 16
+    cases[(cases == 10) & (center >= level)] = 17
+    
+    cell_rows, cell_cols = np.nonzero((cases != 0) & (cases != 15))
+    if len(cell_rows) == 0:
+        return []
+    segments = SEGMENT_TABLE[cases[cell_rows, cell_cols]]  # (cells, 2 slots, from/to)
+    
+    # Global ids of each cell's edges: horizontal edges first, then vertical
+    n_horizontal = n_rows * (n_cols - 1)
+    cell_edges = np.stack([
+        cell_rows * (n_cols - 1) + cell_cols,                     # bottom
+        n_horizontal + cell_rows * n_cols + cell_cols + 1,        # right
+        (cell_rows + 1) * (n_cols - 1) + cell_cols,               # top
+        n_horizontal + cell_rows * n_cols + cell_cols             # left
+    ], axis=1)
+    
+    valid = segments[:, :, 0] >= 0
+    cell_index = np.broadcast_to(np.arange(len(cell_rows))[:, None], valid.shape)[valid]
+    start_edge = cell_edges[cell_index, segments[:, :, 0][valid]]
+    end_edge = cell_edges[cell_index, segments[:, :, 1][valid]]
+    
+    # Crossing point on every edge used, linearly interpolated
+    edge_ids = np.unique(start_edge)
+    is_horizontal = edge_ids < n_horizontal
+    local = np.where(is_horizontal, edge_ids, edge_ids - n_horizontal)
+    row0 = np.where(is_horizontal, local // (n_cols - 1), local // n_cols)
+    col0 = np.where(is_horizontal, local % (n_cols - 1), local % n_cols)
+    row1 = row0 + ~is_horizontal
+    col1 = col0 + is_horizontal
+    v0 = values[row0, col0]
+    v1 = values[row1, col1]
+    t = (level - v0) / (v1 - v0)
+    points = np.column_stack([row0 + t * (row1 - row0), col0 + t * (col1 - col0)]) - 1  # undo padding
+    
+    # Each crossing edge starts exactly one segment and ends exactly one
+    point_of_edge = np.searchsorted(edge_ids, start_edge)
+    segment_of_edge = np.argsort(start_edge)  # aligned with the sorted edge_ids
+    next_segment = segment_of_edge[np.searchsorted(edge_ids, end_edge)]
+    
+    rings = []
+    visited = np.zeros(len(start_edge), dtype=bool)
+    for first in range(len(start_edge)):
+        if visited[first]:
+            continue
+        order = []
+        seg = first
+        while not visited[seg]:
+            visited[seg] = True
+            order.append(seg)
+            seg = next_segment[seg]
+        ring = points[point_of_edge[order]]
+        rings.append(np.vstack([ring, ring[:1]]))
+    return rings
+
+def simplify(points, tolerance):
+    """Douglas-Peucker simplification of a polyline, keeping its endpoints"""
+    if len(points) < 3:
+        return points
+    
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        segment = end - start
+        inner = points[first + 1:last] - start
+        length = np.hypot(*segment)
+        if length == 0:
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            dist = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+        farthest = int(np.argmax(dist))
+        if dist[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return points[keep]
+
+def zoom_tolerance(zoom, pixels=1.0, tile_size=256):
+    """Size in degrees of the given number of screen pixels at a web map zoom"""
+    return pixels * 360.0 / (tile_size * 2**zoom)
+
+def contour_features(data, levels, bounds, resolution, zoom=7, kind='polygons', smoothing_pixels=12):
+    """
+    Derive simplified, quantized contour features from a raster
+    
+    Args:
+        data (np.ndarray): Raster with row 0 at bounds['south']
+        levels (int or array-like): Number of evenly spaced levels, or the levels
+        bounds (dict): 'south' and 'west' edges of the raster
+        resolution (float): Grid spacing of the raster in degrees
+        zoom (int): Web map zoom the features are generalized for
+        kind (str): 'polygons' for filled areas above each level, 'lines' for isolines
+        smoothing_pixels (float): Screen pixels averaged into one contouring cell
+    
+    Returns:
+        list: GeoJSON features with a 'level' property, lowest level first
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if np.isscalar(levels):
+        levels = np.linspace(np.nanmin(data), np.nanmax(data), int(levels) + 2)[1:-1]
+    
+    # Generalize the grid to the zoom before contouring so noise does not
+    # produce thousands of sub-pixel rings
+    tolerance = zoom_tolerance(zoom)
+    factor = max(1, int(round(zoom_tolerance(zoom, smoothing_pixels) / resolution)))
+    if factor > 1:
+        rows, cols = (data.shape[0] // factor) * factor, (data.shape[1] // factor) * factor
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # cells entirely outside the country
+            data = np.nanmean(data[:rows, :cols].reshape(rows // factor, factor, cols // factor, factor),
+                              axis=(1, 3))
+    cell = resolution * factor
+    decimals = max(0, int(math.ceil(-math.log10(tolerance))) + 1)
+    min_area = (2 * tolerance)**2
+    
+    features = []
+    for level in levels:
+        rings = []
+        for ring in marching_squares(data, level):
+            # Grid coordinates of cell centers -> lon/lat
+            coords = np.column_stack([
+                bounds['west'] + (ring[:, 1] + 0.5) * cell,
+                bounds['south'] + (ring[:, 0] + 0.5) * cell
+            ])
+            coords = simplify(coords, tolerance)
+            if len(coords) < 4:
+                continue
+            area = 0.5 * abs(np.dot(coords[:-1, 0], coords[1:, 1]) - np.dot(coords[1:, 0], coords[:-1, 1]))
+            if area < min_area:
+                continue
+            rings.append(np.round(coords, decimals).tolist())
+        if not rings:
+            continue
+        
+        # All rings of a level in one polygon: with even-odd filling, nested
+        # rings render the region above the level including its holes
+        geometry = {'type': 'Polygon', 'coordinates': rings} if kind == 'polygons' else \
+                   {'type': 'MultiLineString', 'coordinates': rings}
+        features.append({
+            'type': 'Feature',
+            'geometry': geometry,
+            'properties': {'level': round(float(level), 2)}
+        })
+    return features
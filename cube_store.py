@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import shutil
+import threading
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+from cache_utils import LRUCache
+
+# Decompressed chunks shared by every store in the process, keyed on
+# (store path, scenario, year, revision, chunk)
+_chunk_cache = LRUCache(max_entries=4096, max_bytes=256 * 1024 * 1024)
+
+class CubeStore:
+    """
+    Chunked on-disk store of (scenario x year x lat x lon) raster cubes
+
+    Each year of a scenario is split into compressed spatial chunks under
+    <path>/<scenario>/<year>/, and index.json records the grid, the stored
+    years and which chunks hold data, so reads touch only the chunks that
+    overlap the requested years and window. Chunks with no finite values
+    (outside the country) are not written.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, path, bounds, resolution, shape, chunk_shape=(128, 128), dtype='float32'):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        grid = json.loads(json.dumps({
+            'bounds': bounds,
+            'resolution': resolution,
+            'shape': list(shape),
+            'chunk_shape': list(chunk_shape),
+            'dtype': np.dtype(dtype).str
+        }))
+        index = self._read_index()
+        if index is None:
+            index = {'grid': grid, 'scenarios': {}}
+            self._write_index(index)
+        elif index['grid'] != grid:
+            raise ValueError(f"Cube store at {path} was created for a different grid")
+        self._index = index
+
+        self.bounds = grid['bounds']
+        self.resolution = grid['resolution']
+        self.shape = tuple(grid['shape'])
+        self.chunk_shape = tuple(grid['chunk_shape'])
+        self.dtype = np.dtype(grid['dtype'])
+
+    def _index_path(self):
+        return os.path.join(self.path, self.INDEX_FILE)
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_index(self, index):
+        tmp_path = f'{self._index_path()}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _year_dir(self, scenario, year):
+        return os.path.join(self.path, quote(scenario, safe=''), str(int(year)))
+
+    def _chunk_path(self, scenario, year, rev, chunk):
+        return os.path.join(self._year_dir(scenario, year), f'{chunk[0]}_{chunk[1]}.r{rev}.npz')
+
+    @property
+    def scenarios(self):
+        """Names of the stored scenarios"""
+        return list(self._index['scenarios'])
+
+    def years(self, scenario):
+        """Sorted years stored for a scenario"""
+        return sorted(int(year) for year in self._index['scenarios'].get(scenario, {}))
+
+    def get_axes(self, bbox=None):
+        """Latitudes and longitudes of the cells in a bounding box, or the whole grid"""
+        rows, cols = self.window(bbox)
+        lats = self.bounds['south'] + np.arange(rows.start, rows.stop) * self.resolution
+        lons = self.bounds['west'] + np.arange(cols.start, cols.stop) * self.resolution
+        return lats, lons
+
+    def window(self, bbox=None):
+        """
+        Row and column slices of the cells inside a bounding box
+
+        Args:
+            bbox (tuple, optional): (south, west, north, east) in degrees
+
+        Returns:
+            tuple: (row slice, column slice); row 0 is the south edge
+        """
+        if bbox is None:
+            return slice(0, self.shape[0]), slice(0, self.shape[1])
+        south, west, north, east = bbox
+        eps = 1e-9
+        rows = (int(np.ceil((south - self.bounds['south']) / self.resolution - eps)),
+                int(np.floor((north - self.bounds['south']) / self.resolution + eps)) + 1)
+        cols = (int(np.ceil((west - self.bounds['west']) / self.resolution - eps)),
+                int(np.floor((east - self.bounds['west']) / self.resolution + eps)) + 1)
+        rows = np.clip(rows, 0, self.shape[0])
+        cols = np.clip(cols, 0, self.shape[1])
+        return slice(rows[0], max(rows)), slice(cols[0], max(cols))
+
+    def write(self, scenario, years, cube):
+        """
+        Store or replace years of a scenario; other stored years are kept, so
+        new forecast years can be appended at any time
+
+        Args:
+            scenario (str): Scenario name
+            years (array-like): Year of each layer
+            cube (np.ndarray): (len(years), rows, cols) array on the store grid
+        """
+        cube = np.asarray(cube)
+        years = [int(year) for year in np.atleast_1d(years)]
+        if cube.shape != (len(years),) + self.shape:
+            raise ValueError(f"Expected a cube of shape {(len(years),) + self.shape}, got {cube.shape}")
+
+        chunk_rows, chunk_cols = self.chunk_shape
+        # A fresh revision per write, so rewritten years never overwrite the
+        # chunks the current index points to
+        rev = time.time_ns()
+        written = {}
+        for year, layer in zip(years, cube.astype(self.dtype, copy=False)):
+            os.makedirs(self._year_dir(scenario, year), exist_ok=True)
+            chunks = []
+            for i in range(0, self.shape[0], chunk_rows):
+                for j in range(0, self.shape[1], chunk_cols):
+                    block = layer[i:i + chunk_rows, j:j + chunk_cols]
+                    if not np.isfinite(block).any():
+                        continue
+                    chunk = (i // chunk_rows, j // chunk_cols)
+                    np.savez_compressed(self._chunk_path(scenario, year, rev, chunk), data=block)
+                    chunks.append(list(chunk))
+            written[str(year)] = {'rev': rev, 'chunks': chunks}
+
+        with self._lock:
+            # Merge into the latest index so concurrent writers keep each other's years
+            index = self._read_index() or self._index
+            stale = {year: index['scenarios'].get(scenario, {}).get(year) for year in written}
+            index['scenarios'].setdefault(scenario, {}).update(written)
+            self._write_index(index)
+            self._index = index
+
+        # Earlier revisions are no longer referenced by the index
+        for year, entry in stale.items():
+            if entry is not None:
+                for chunk in entry['chunks']:
+                    try:
+                        os.remove(self._chunk_path(scenario, year, entry['rev'], chunk))
+                    except FileNotFoundError:
+                        pass
+
+    def _load_chunk(self, scenario, year, rev, chunk):
+        key = (self.path, scenario, year, rev, chunk)
+        block = _chunk_cache.get(key)
+        if block is None:
+            with np.load(self._chunk_path(scenario, year, rev, chunk)) as f:
+                block = f['data']
+            block.flags.writeable = False
+            _chunk_cache.put(key, block)
+        return block
+
+    def read(self, scenario, years=None, bbox=None):
+        """
+        Read a sub-cube, decompressing only the chunks it overlaps
+
+        Args:
+            scenario (str): Scenario name
+            years (array-like, optional): Years to read, default all stored years
+            bbox (tuple, optional): (south, west, north, east), default the whole grid
+
+        Returns:
+            np.ndarray: (years, rows, cols) cube, NaN where nothing was stored;
+                        see get_axes() for the cell coordinates
+        """
+        if scenario not in self._index['scenarios']:
+            raise KeyError(f"Unknown scenario: {scenario}")
+        stored = self._index['scenarios'][scenario]
+        years = self.years(scenario) if years is None else [int(year) for year in np.atleast_1d(years)]
+        missing = [year for year in years if str(year) not in stored]
+        if missing:
+            raise KeyError(f"Years not stored for {scenario}: {missing}")
+
+        rows, cols = self.window(bbox)
+        chunk_rows, chunk_cols = self.chunk_shape
+        out = np.full((len(years), rows.stop - rows.start, cols.stop - cols.start), np.nan, dtype=self.dtype)
+
+        for k, year in enumerate(years):
+            entry = stored[str(year)]
+            for i, j in entry['chunks']:
+                r0, c0 = i * chunk_rows, j * chunk_cols
+                r_lo, r_hi = max(r0, rows.start), min(r0 + chunk_rows, rows.stop)
+                c_lo, c_hi = max(c0, cols.start), min(c0 + chunk_cols, cols.stop)
+                if r_lo >= r_hi or c_lo >= c_hi:
+                    continue
+                block = self._load_chunk(scenario, str(year), entry['rev'], (i, j))
+                out[k, r_lo - rows.start:r_hi - rows.start, c_lo - cols.start:c_hi - cols.start] = \
+                    block[r_lo - r0:r_hi - r0, c_lo - c0:c_hi - c0]
+        return out
+
+    def read_point(self, scenario, lat, lon, years=None):
+        """
+        Values of the cell nearest to a point for every requested year, as a
+        Series indexed by year; all NaN for points outside the grid bounds
+        """
+        years = self.years(scenario) if years is None else [int(year) for year in np.atleast_1d(years)]
+        if not (self.bounds['south'] <= lat <= self.bounds['north'] and
+                self.bounds['west'] <= lon <= self.bounds['east']):
+            return pd.Series(np.nan, index=pd.Index(years, name='year'), dtype=self.dtype)
+
+        # The last row and column can sit up to a cell inside the north and
+        # east bounds, so points near those edges snap to them
+        row = min(int(round((lat - self.bounds['south']) / self.resolution)), self.shape[0] - 1)
+        col = min(int(round((lon - self.bounds['west']) / self.resolution)), self.shape[1] - 1)
+        lat_cell = self.bounds['south'] + row * self.resolution
+        lon_cell = self.bounds['west'] + col * self.resolution
+        values = self.read(scenario, years, (lat_cell, lon_cell, lat_cell, lon_cell))
+        return pd.Series(values[:, 0, 0], index=pd.Index(years, name='year'))
+
+    def delete(self, scenario):
+        """Remove a scenario and its chunks"""
+        with self._lock:
+            index = self._read_index() or self._index
+            index['scenarios'].pop(scenario, None)
+            self._write_index(index)
+            self._index = index
+        shutil.rmtree(os.path.join(self.path, quote(scenario, safe='')), ignore_errors=True)
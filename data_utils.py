@@ -4,7 +4,9 @@ import json
 from datetime import datetime
 import os
 import time
+from profiling import profiled
 
+@profiled('data.load')
 def load_nepal_climate_data():
     """
     Loads climate data for Nepal from the World Bank Climate Data API
@@ -107,6 +109,7 @@ def load_nepal_climate_data():
             print(f"Error loading local data: {local_error}")
             return None
 
+@profiled('data.extract_features')
 def extract_features(climate_data):
     """
     Extracts relevant features from climate data including daily and monthly time features
@@ -150,6 +153,7 @@ def extract_features(climate_data):
         print(f"Error extracting features: {e}")
         return None
 
+@profiled('data.prepare_features')
 def prepare_features_for_model(features_df):
     """
     Prepares features for model training by separating target and feature columns
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Points kept per horizontal pixel of the chart; two keep the min and max
+# of a pixel column visible
+POINTS_PER_PIXEL = 2
+
+# Width assumed for charts in the wide page layout
+DEFAULT_CHART_WIDTH = 1200
+
+def _as_float(values):
+    """Numeric view of x values, converting datetimes to nanoseconds"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    if values.dtype == object:
+        return pd.to_datetime(values).to_numpy().astype('datetime64[ns]').astype(np.int64).astype(float)
+    return values.astype(float)
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets point selection
+
+    The first and last points are kept and the rest are split into
+    n_out - 2 equal buckets. Each bucket keeps the point forming the largest
+    triangle with the point kept from the previous bucket and the mean of the
+    next bucket. Bucket means and areas are computed in NumPy; only the walk
+    over buckets is a Python loop.
+
+    Args:
+        x (array-like): Monotonic x values (numbers or datetimes)
+        y (array-like): Y values
+        n_out (int): Number of points to keep
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # NaNs would poison the areas; treat them as the series mean
+    if np.isnan(y).any():
+        y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Mean of every bucket at once, from cumulative sums
+    x_cum = np.r_[0.0, np.cumsum(x)]
+    y_cum = np.r_[0.0, np.cumsum(y)]
+    counts = ends - starts
+    x_means = (x_cum[ends] - x_cum[starts]) / counts
+    y_means = (y_cum[ends] - y_cum[starts]) / counts
+    # The last bucket looks ahead to the final point
+    next_x = np.r_[x_means[1:], x[-1]]
+    next_y = np.r_[y_means[1:], y[-1]]
+
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        ax, ay = x[anchor], y[anchor]
+        areas = np.abs((ax - next_x[i]) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y[i] - ay))
+        anchor = start + int(np.argmax(areas))
+        selected[i + 1] = anchor
+    return selected
+
+def max_points_for_width(width_px=None):
+    """Number of points worth drawing on a chart width_px pixels wide"""
+    return (width_px or DEFAULT_CHART_WIDTH) * POINTS_PER_PIXEL
+
+def downsample_series(x, y, width_px=None):
+    """
+    LTTB-downsampled copy of a series sized to the chart width
+
+    Returns:
+        tuple: (x, y) arrays, unchanged if already short enough
+    """
+    indices = lttb_indices(x, y, max_points_for_width(width_px))
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+def downsample_figure(fig, width_px=None, enabled=True):
+    """
+    Downsample every line trace of a Plotly figure in place with LTTB
+
+    Traces with markers only are left alone, as are traces already within
+    the point budget. Per-point arrays (text, hovertext, customdata) are
+    reduced with the same indices.
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to reduce
+        width_px (int, optional): Chart width in pixels, default DEFAULT_CHART_WIDTH
+        enabled (bool): Leave the figure at full resolution when False
+
+    Returns:
+        plotly.graph_objects.Figure: The same figure
+    """
+    if not enabled:
+        return fig
+    n_out = max_points_for_width(width_px)
+    for trace in fig.data:
+        if trace.type not in ('scatter', 'scattergl') or trace.x is None or trace.y is None:
+            continue
+        if trace.mode is not None and 'lines' not in trace.mode:
+            continue
+        n = len(trace.x)
+        if n <= n_out:
+            continue
+        indices = lttb_indices(trace.x, trace.y, n_out)
+        updates = {'x': np.asarray(trace.x)[indices], 'y': np.asarray(trace.y)[indices]}
+        for name in ('text', 'hovertext', 'customdata'):
+            values = getattr(trace, name)
+            if values is not None and not isinstance(values, str) and len(values) == n:
+                updates[name] = np.asarray(values)[indices]
+        trace.update(updates)
+    return fig
@@ -0,0 +1,84 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from cache_utils import LRUCache, get_cache_dir, hash_dataframe, hash_array
+
+# Rendered figures keyed on a data digest plus plot parameters; set
+# CLIMATE_APP_FIGURE_CACHE_SPILL=1 to keep evicted figures on disk
+_figure_cache = LRUCache(
+    max_entries=128,
+    max_bytes=64 * 1024 * 1024,
+    spill_dir=get_cache_dir('figures') if os.environ.get('CLIMATE_APP_FIGURE_CACHE_SPILL') else None
+)
+
+def hash_data(data):
+    """Returns a digest of a DataFrame, Series, array or a list/tuple/dict of them"""
+    if isinstance(data, pd.DataFrame):
+        return hash_dataframe(data)
+    if isinstance(data, pd.Series):
+        return hash_dataframe(data.to_frame())
+    if isinstance(data, np.ndarray):
+        return hash_array(data)
+    if isinstance(data, (list, tuple)):
+        return hashlib.sha1(''.join(hash_data(item) for item in data).encode()).hexdigest()
+    if isinstance(data, dict):
+        return hashlib.sha1(''.join(f'{key}={hash_data(value)}' for key, value in sorted(data.items())).encode()).hexdigest()
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+def figure_key(kind, name, data, **params):
+    """Cache key for a figure: its kind, plot name, data digest and parameters"""
+    payload = json.dumps([kind, name, hash_data(data), params], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def cached_png(name, data, render, dpi=100, **params):
+    """
+    PNG bytes of a matplotlib figure, calling render() only on a cache miss
+
+    Args:
+        name (str): Plot name, unique per plotting function
+        data: Data the figure is drawn from (DataFrame, Series, array or a list/dict of them)
+        render (callable): Returns a matplotlib Figure, or None on failure
+        dpi (int): Output resolution
+        **params: Any other plot parameters that change the image
+
+    Returns:
+        bytes: PNG image data, or None if render() failed
+    """
+    key = figure_key('png', name, data, dpi=dpi, **params)
+    png = _figure_cache.get(key)
+    if png is None:
+        # matplotlib is imported only by pages that render with it
+        from visualizations import figure_to_png
+        fig = render()
+        if fig is None:
+            return None
+        png = figure_to_png(fig, dpi)
+        _figure_cache.put(key, png)
+    return png
+
+def cached_plotly(name, data, build, **params):
+    """
+    Plotly figure restored from cached JSON, calling build() only on a cache miss
+
+    Args:
+        name (str): Plot name, unique per chart
+        data: Data the figure is drawn from (DataFrame, Series, array or a list/dict of them)
+        build (callable): Returns a plotly Figure
+        **params: Any other plot parameters that change the figure
+
+    Returns:
+        plotly.graph_objects.Figure: The figure
+    """
+    key = figure_key('plotly', name, data, **params)
+    spec = _figure_cache.get(key)
+    if spec is None:
+        spec = build().to_json()
+        _figure_cache.put(key, spec)
+    return pio.from_json(spec)
+
+def clear_figure_cache():
+    """Drop every cached figure held in memory"""
+    _figure_cache.clear()
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+from datetime import datetime
+import pandas as pd
+from cache_utils import get_cache_dir
+
+# Stored forecasts are looked up by (city, model, training data, years) and
+# ordered by vintage, the UTC timestamp of the run that produced them.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT NOT NULL,
+    model_key TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    vintage TEXT NOT NULL,
+    first_year INTEGER NOT NULL,
+    last_year INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    city TEXT NOT NULL,
+    target_year INTEGER NOT NULL,
+    model_key TEXT NOT NULL,
+    vintage TEXT NOT NULL,
+    temperature REAL,
+    sarima_pred REAL,
+    rf_pred REAL
+);
+CREATE INDEX IF NOT EXISTS idx_forecasts_lookup
+    ON forecasts (city, target_year, model_key, vintage);
+CREATE INDEX IF NOT EXISTS idx_forecasts_run
+    ON forecasts (run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup
+    ON runs (city, model_key, data_hash, vintage);
+"""
+
+# Name stored for forecasts of the base (country-wide) model
+BASE_CITY = ''
+
+class ForecastStore:
+    """SQLite-backed history of forecast runs with indexed vintage lookups"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), 'forecasts.sqlite')
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # A short-lived connection per call keeps the store usable from
+        # Streamlit's session threads
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def record(self, predictions, model_key, data_hash, city_name=None):
+        """Store a forecast run and return its run id"""
+        city = city_name or BASE_CITY
+        vintage = datetime.utcnow().isoformat(timespec='microseconds')
+        years = predictions['year'].astype(int)
+        
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO runs (city, model_key, data_hash, vintage, first_year, last_year) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (city, model_key, data_hash, vintage, int(years.min()), int(years.max()))
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT INTO forecasts (run_id, city, target_year, model_key, vintage, '
+                'temperature, sarima_pred, rf_pred) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (run_id, city, int(year), model_key, vintage,
+                     float(temp), float(sarima), float(rf))
+                    for year, temp, sarima, rf in zip(
+                        years, predictions['temperature'],
+                        predictions['sarima_pred'], predictions['rf_pred']
+                    )
+                ]
+            )
+        return run_id
+
+    def latest(self, model_key, data_hash, first_year, last_year, city_name=None):
+        """
+        Return the latest stored forecast of exactly the given years, or None
+        
+        Runs of a longer horizon are not sliced: the random forest features
+        summarize the whole SARIMA horizon, so the first years of a 10-year
+        run differ from a 5-year run.
+        """
+        city = city_name or BASE_CITY
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT run_id FROM runs WHERE city = ? AND model_key = ? AND data_hash = ? '
+                'AND first_year = ? AND last_year = ? ORDER BY vintage DESC LIMIT 1',
+                (city, model_key, data_hash, first_year, last_year)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            predictions = pd.read_sql_query(
+                'SELECT target_year AS year, temperature, sarima_pred, rf_pred '
+                'FROM forecasts WHERE run_id = ? AND target_year BETWEEN ? AND ? '
+                'ORDER BY target_year',
+                conn, params=(row[0], first_year, last_year)
+            )
+        
+        if city_name:
+            predictions['city'] = city_name
+        return predictions
+
+    def history(self, target_year, model_key=None, city_name=None):
+        """Return every stored vintage of the forecast for one city and year"""
+        query = (
+            'SELECT vintage, model_key, target_year AS year, temperature, sarima_pred, rf_pred '
+            'FROM forecasts WHERE city = ? AND target_year = ?'
+        )
+        params = [city_name or BASE_CITY, target_year]
+        if model_key is not None:
+            query += ' AND model_key = ?'
+            params.append(model_key)
+        query += ' ORDER BY vintage'
+        
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def get_or_compute(self, compute, years, model_key, data_hash, city_name=None):
+        """
+        Return the latest stored forecast for the given years, calling
+        compute() and recording its result only on a miss
+        """
+        years = list(years)
+        predictions = self.latest(model_key, data_hash, years[0], years[-1], city_name)
+        if predictions is not None:
+            return predictions
+        
+        predictions = compute()
+        if predictions is not None:
+            self.record(predictions, model_key, data_hash, city_name)
+            predictions = predictions.reset_index(drop=True)
+        return predictions
@@ -3,22 +3,71 @@ from folium import plugins
 import branca.colormap as cm
 import numpy as np
 import pandas as pd
-import rasterio
-from rasterio.transform import from_origin
 import os
-import requests
-from io import BytesIO
 from folium.plugins import MarkerCluster
 import json
+import hashlib
+import warnings
+import threading
+from cache_utils import LRUCache, get_cache_dir, hash_array
+from raster_render import ELEVATION_COLORS, TEMPERATURE_COLORS, build_colormap, raster_to_data_url
+from tile_server import build_tile_pyramid, get_tile_server, native_zoom
+from contours import contour_features
+from cube_store import CubeStore
+from station_registry import StationRegistry
+from profiling import profile_stage, profiled
+
+# Bump when generate_elevation_data changes so cached grids are rebuilt
+ELEVATION_GENERATOR_VERSION = 3
+
+# Bump when read_dem changes so grids cached from a DEM are read again
+DEM_READER_VERSION = 2
+
+# Environmental lapse rate, °C per 1000 m
+LAPSE_RATE = 6.5
+
+# Elevation grids shared read-only by every visualizer in the process
+_shared_grids = {}
+_shared_grids_lock = threading.RLock()
+
+# Rendered map HTML keyed on layer content; set CLIMATE_APP_MAP_CACHE_SPILL=1
+# to keep evicted maps on disk
+_map_html_cache = LRUCache(
+    max_entries=16,
+    max_bytes=64 * 1024 * 1024,
+    spill_dir=get_cache_dir('maps') if os.environ.get('CLIMATE_APP_MAP_CACHE_SPILL') else None
+)
+
+def _load_shared_grid(kind, key, build):
+    """
+    Return a read-only grid from the in-process cache or from
+    .cache/<kind>/<key>.npy (memory-mapped), calling build() on a miss
+    """
+    with _shared_grids_lock:
+        if (kind, key) not in _shared_grids:
+            path = os.path.join(get_cache_dir(kind), f'{key}.npy')
+            if not os.path.exists(path):
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, build())
+                os.replace(tmp_path, path)
+            _shared_grids[(kind, key)] = np.load(path, mmap_mode='r')
+        return _shared_grids[(kind, key)]
 
 class NepalMapVisualizer:
-    def __init__(self):
+    def __init__(self, resolution=0.01, seed=42, dem_path=None):
         self.nepal_bounds = {
             'north': 30.45,
             'south': 26.35,
             'east': 88.20,
             'west': 80.06
         }
+        self.resolution = resolution  # grid spacing in degrees
+        self.seed = seed  # seed for the synthetic terrain
+        # Optional real DEM (GeoTIFF or VRT in EPSG:4326), e.g. SRTM or ASTER
+        self.dem_path = dem_path or os.environ.get('CLIMATE_APP_DEM')
+        # Country outline; raster work is limited to the cells inside it
+        self.boundary_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nepal_boundary.json')
         self.elevation_data = None
         self.temperature_data = None
         
@@ -68,62 +117,266 @@ class NepalMapVisualizer:
             }
         ]
         
-        # Initialize elevation data
-        self.elevation_data = self.generate_elevation_data()
+    @property
+    def elevation_data(self):
+        """Elevation grid (m), loaded or generated on first access"""
+        if self._elevation_data is None:
+            self._elevation_data = self.load_elevation_data()
+        return self._elevation_data
+        
+    @elevation_data.setter
+    def elevation_data(self, value):
+        self._elevation_data = value
+        
+    def elevation_cache_key(self):
+        """Digest of everything that determines the elevation grid"""
+        params = {
+            'bounds': self.nepal_bounds,
+            'resolution': self.resolution,
+            'boundary': self.load_country_boundary()
+        }
+        if self.dem_path:
+            stat = os.stat(self.dem_path)
+            params['dem'] = [os.path.abspath(self.dem_path), stat.st_size, stat.st_mtime]
+            params['dem_reader'] = DEM_READER_VERSION
+        else:
+            params.update({
+                'version': ELEVATION_GENERATOR_VERSION,
+                'seed': self.seed,
+                'regions': self.regions,
+                'river_valleys': self.river_valleys
+            })
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        
+    @profiled('map.elevation')
+    def load_elevation_data(self):
+        """
+        Load the elevation grid from the shared in-process cache or the
+        on-disk .npy cache (memory-mapped read-only), reading the DEM or
+        generating synthetic terrain on a miss
+        """
+        return _load_shared_grid(
+            'elevation',
+            self.elevation_cache_key(),
+            lambda: self.read_dem() if self.dem_path else self.generate_elevation_data()
+        )
+        
+    @property
+    def country_mask(self):
+        """Boolean grid of the cells inside the country boundary, rasterized once per grid"""
+        params = {
+            'bounds': self.nepal_bounds,
+            'resolution': self.resolution,
+            'boundary': self.load_country_boundary()
+        }
+        key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return _load_shared_grid('masks', key, self.rasterize_country_boundary)
+        
+    @property
+    def mask_indices(self):
+        """Flat grid indices of the cells inside the country, in row-major order"""
+        mask = self.country_mask
+        cached = getattr(self, '_mask_indices', None)
+        if cached is None or cached[0] is not mask:
+            cached = (mask, np.flatnonzero(mask))
+            self._mask_indices = cached
+        return cached[1]
+        
+    def load_country_boundary(self):
+        """Rings of the country polygon as lists of (lon, lat)"""
+        if getattr(self, '_country_boundary', None) is None:
+            with open(self.boundary_path) as f:
+                geometry = json.load(f)['geometry']
+            polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+            self._country_boundary = [ring for polygon in polygons for ring in polygon]
+        return self._country_boundary
+        
+    def rasterize_country_boundary(self):
+        """Even-odd point-in-polygon test of every grid point, one pass per polygon edge"""
+        lats, lons = self.get_grid_axes()
+        inside = np.zeros((len(lats), len(lons)), dtype=bool)
+        for ring in self.load_country_boundary():
+            ring = np.asarray(ring, dtype=float)
+            for (x1, y1), (x2, y2) in zip(ring[:-1], ring[1:]):
+                crosses = (y1 > lats) != (y2 > lats)
+                if not crosses.any():
+                    continue
+                x_cross = x1 + (lats[crosses] - y1) * (x2 - x1) / (y2 - y1)
+                inside[crosses] ^= lons[None, :] < x_cross[:, None]
+        return inside
+        
+    def compress(self, data):
+        """Keep only the cells inside the country: (..., rows, cols) -> (..., cells)"""
+        data = np.asarray(data)
+        return data.reshape(data.shape[:-2] + (-1,))[..., self.mask_indices]
+        
+    def expand(self, values, fill_value=np.nan):
+        """Scatter compressed cell values back onto the full grid, filling outside cells"""
+        values = np.asarray(values)
+        lats, lons = self.get_grid_axes()
+        grid = np.full(values.shape[:-1] + (len(lats) * len(lons),), fill_value, dtype=values.dtype)
+        grid[..., self.mask_indices] = values
+        return grid.reshape(values.shape[:-1] + (len(lats), len(lons)))
+        
+    def get_grid_axes(self):
+        """Latitudes and longitudes of the raster grid rows and columns"""
+        lats = np.arange(self.nepal_bounds['south'], self.nepal_bounds['north'], self.resolution)
+        lons = np.arange(self.nepal_bounds['west'], self.nepal_bounds['east'], self.resolution)
+        return lats, lons
+        
+    def open_cube_store(self, name='forecasts'):
+        """Chunked on-disk store for temperature cubes on this grid, under .cache/cubes/"""
+        lats, lons = self.get_grid_axes()
+        grid_key = hashlib.sha1(json.dumps([self.nepal_bounds, self.resolution]).encode()).hexdigest()[:12]
+        return CubeStore(
+            get_cache_dir('cubes', f'{name}-{grid_key}'),
+            self.nepal_bounds,
+            self.resolution,
+            (len(lats), len(lons))
+        )
+        
+    def read_dem(self, dem_path=None):
+        """
+        Read the DEM window covering nepal_bounds at the grid resolution
+        
+        Only the blocks inside the window are read, and GDAL serves the
+        decimated read from the file's overviews when it has them, so a
+        full 30 m tile is never loaded into memory.
+        """
+        # rasterio (GDAL) is only needed when a real DEM is configured
+        import rasterio
+        from rasterio.enums import Resampling
+        from rasterio.windows import from_bounds
+        
+        dem_path = dem_path or self.dem_path
+        lats, lons = self.get_grid_axes()
+        
+        with rasterio.open(dem_path) as src:
+            if src.crs is not None and not src.crs.is_geographic:
+                raise ValueError(f"DEM must use geographic (lat/lon) coordinates, got {src.crs}")
+            
+            # Grid row i is the point at south + i * resolution, so each output
+            # pixel spans half a cell either side of its grid point
+            half = self.resolution / 2
+            window = from_bounds(
+                self.nepal_bounds['west'] - half, self.nepal_bounds['south'] - half,
+                self.nepal_bounds['west'] - half + len(lons) * self.resolution,
+                self.nepal_bounds['south'] - half + len(lats) * self.resolution,
+                transform=src.transform
+            )
+            data = src.read(
+                1,
+                window=window,
+                out_shape=(len(lats), len(lons)),
+                resampling=Resampling.average,
+                boundless=True,
+                masked=True
+            )
+        
+        # Raster rows run north to south; grid row 0 is the southern edge
+        elevation = np.flipud(data.astype(np.float32).filled(np.nan))
+        elevation[~self.country_mask] = np.nan
+        return elevation
         
     def generate_elevation_data(self):
-        """Generate realistic elevation data for Nepal"""
-        resolution = 0.01
-        lats = np.arange(self.nepal_bounds['south'], self.nepal_bounds['north'], resolution)
-        lons = np.arange(self.nepal_bounds['west'], self.nepal_bounds['east'], resolution)
-        elevation = np.zeros((len(lats), len(lons)))
-        
-        # Generate base elevation for each region
-        for i, lat in enumerate(lats):
-            for j, lon in enumerate(lons):
-                # Determine region
-                region = None
-                for reg_name, reg_data in self.regions.items():
-                    if reg_data['bounds']['south'] <= lat < reg_data['bounds']['north']:
-                        region = reg_data
-                        break
-                
-                if region:
-                    # Base elevation for the region
-                    base_elev = region['base_elevation']
-                    
-                    # Add regional variation
-                    variation = np.random.normal(0, region['variation'])
-                    
-                    # Add east-west variation (higher in the middle)
-                    ew_factor = 1 - abs(lon - 84.0) / 4.0  # Center at 84°E
-                    ew_variation = 500 * ew_factor
-                    
-                    elevation[i, j] = base_elev + variation + ew_variation
-        
-        # Add river valleys
+        """Generate realistic elevation data for Nepal (NaN outside the country)"""
+        lats, lons = self.get_grid_axes()
+        rng = np.random.default_rng(self.seed)
+        
+        # Only the cells inside the country are synthesized
+        rows, cols = np.divmod(self.mask_indices, len(lons))
+        cell_lats = lats[rows]
+        cell_lons = lons[cols]
+        
+        # Determine region of each row from its latitude band
+        bands = sorted(self.regions.values(), key=lambda reg: reg['bounds']['south'])
+        souths = np.array([reg['bounds']['south'] for reg in bands])
+        norths = np.array([reg['bounds']['north'] for reg in bands])
+        band_idx = np.searchsorted(souths, lats, side='right') - 1
+        band_idx_safe = np.clip(band_idx, 0, len(bands) - 1)
+        in_region = (band_idx >= 0) & (lats < norths[band_idx_safe])
+        
+        base_elev = np.array([reg['base_elevation'] for reg in bands], dtype=np.float32)[band_idx_safe]
+        variation = np.array([reg['variation'] for reg in bands], dtype=np.float32)[band_idx_safe]
+        
+        # Base elevation plus regional variation, built in place to limit
+        # memory at fine resolutions
+        elevation = rng.standard_normal(len(rows), dtype=np.float32)
+        elevation *= variation[rows]
+        elevation += base_elev[rows]
+        
+        # Add east-west variation (higher in the middle)
+        ew_factor = 1 - np.abs(lons - 84.0) / 4.0  # Center at 84°E
+        elevation += (500 * ew_factor).astype(np.float32)[cols]
+        elevation[~in_region[rows]] = 0
+        
+        # Add river valleys, only evaluating the cells the valley can reach
         for valley in self.river_valleys:
-            for i, lat in enumerate(lats):
-                for j, lon in enumerate(lons):
-                    # Check distance from river path
-                    min_dist = float('inf')
-                    for path_lat, path_lon in valley['path']:
-                        dist = np.sqrt((lat - path_lat)**2 + (lon - path_lon)**2)
-                        min_dist = min(min_dist, dist)
-                    
-                    if min_dist < valley['width']:
-                        # Create valley effect
-                        valley_factor = np.exp(-(min_dist / valley['width'])**2)
-                        elevation[i, j] -= valley['depth'] * valley_factor
+            width = valley['width']
+            path = np.array(valley['path'], dtype=float)
+            near = np.flatnonzero(
+                (cell_lats >= path[:, 0].min() - width) & (cell_lats <= path[:, 0].max() + width) &
+                (cell_lons >= path[:, 1].min() - width) & (cell_lons <= path[:, 1].max() + width)
+            )
+            near_lats = cell_lats[near]
+            near_lons = cell_lons[near]
+            
+            # Squared distance to the nearest path point
+            dist_sq = np.full(len(near), np.inf)
+            for path_lat, path_lon in path:
+                np.minimum(dist_sq, (near_lats - path_lat)**2 + (near_lons - path_lon)**2, out=dist_sq)
+            
+            # Create valley effect
+            valley_effect = valley['depth'] * np.exp(-dist_sq / width**2)
+            valley_effect[dist_sq >= width**2] = 0
+            elevation[near] -= valley_effect.astype(np.float32)
         
         # Add some noise for natural terrain
-        noise = np.random.normal(0, 100, elevation.shape)
+        noise = rng.standard_normal(elevation.shape, dtype=np.float32)
+        noise *= 100
         elevation += noise
         
         # Ensure elevation stays within reasonable bounds
-        elevation = np.clip(elevation, 50, 8848)  # Mount Everest height
+        np.clip(elevation, 50, 8848, out=elevation)  # Mount Everest height
         
-        return elevation
+        return self.expand(elevation)
+        
+    def sample_elevation(self, lats, lons, nodata=np.nan):
+        """
+        Bilinearly interpolate grid elevations at arbitrary points
+        
+        Args:
+            lats (array-like): Query latitudes
+            lons (array-like): Query longitudes, broadcastable against lats
+            nodata (float): Value returned for points outside nepal_bounds
+        
+        Returns:
+            np.ndarray: Elevations (m) with the broadcast shape of lats and lons
+        """
+        lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=float),
+                                         np.asarray(lons, dtype=float))
+        grid = self.elevation_data
+        n_rows, n_cols = grid.shape
+        
+        inside = ((lats >= self.nepal_bounds['south']) & (lats <= self.nepal_bounds['north']) &
+                  (lons >= self.nepal_bounds['west']) & (lons <= self.nepal_bounds['east']))
+        
+        # Fractional grid positions, clamped so edge points reuse the last cell
+        rows = np.clip((lats - self.nepal_bounds['south']) / self.resolution, 0, n_rows - 1)
+        cols = np.clip((lons - self.nepal_bounds['west']) / self.resolution, 0, n_cols - 1)
+        rows = np.nan_to_num(rows)
+        cols = np.nan_to_num(cols)
+        r0 = np.minimum(rows.astype(np.intp), n_rows - 2)
+        c0 = np.minimum(cols.astype(np.intp), n_cols - 2)
+        fr = rows - r0
+        fc = cols - c0
+        
+        elevation = (grid[r0, c0] * (1 - fr) * (1 - fc) +
+                     grid[r0 + 1, c0] * fr * (1 - fc) +
+                     grid[r0, c0 + 1] * (1 - fr) * fc +
+                     grid[r0 + 1, c0 + 1] * fr * fc)
+        
+        return np.where(inside, elevation, nodata)
         
     def create_base_map(self, center_lat=28.3949, center_lon=84.1240, zoom_start=7):
         """Create a base map centered on Nepal"""
@@ -133,50 +386,73 @@ class NepalMapVisualizer:
             tiles='CartoDB positron'
         )
         
+    def add_raster_overlay(self, m, data, colors, caption, name=None):
+        """Colorize a raster through a lookup table and add it as an image overlay"""
+        colormap = build_colormap(colors, data, caption)
+        
+        folium.raster_layers.ImageOverlay(
+            raster_to_data_url(data, colormap, mask=self.country_mask),
+            bounds=[[self.nepal_bounds['south'], self.nepal_bounds['west']],
+                   [self.nepal_bounds['north'], self.nepal_bounds['east']]],
+            opacity=0.7,
+            name=name
+        ).add_to(m)
+        
+        colormap.add_to(m)
+        
+    def add_raster_tiles(self, m, data, colors, caption, name=None):
+        """Cut a raster into an XYZ tile pyramid and add it as a tile layer"""
+        colormap = build_colormap(colors, data, caption)
+        key = build_tile_pyramid(data, colormap, self.nepal_bounds, self.resolution)
+        
+        folium.TileLayer(
+            tiles=get_tile_server().tile_url(key),
+            attr='Nepal Climate Analysis',
+            name=name or caption,
+            overlay=True,
+            opacity=0.7,
+            max_native_zoom=native_zoom(self.resolution)
+        ).add_to(m)
+        
+        colormap.add_to(m)
+        
+    def add_contour_layer(self, m, data, colors, caption, name=None, levels=10, zoom=7,
+                          kind='polygons'):
+        """
+        Add contour polygons or isolines derived from a raster as a vector layer
+        
+        The features are generalized for the given zoom, so the payload depends
+        on the number of levels rather than the grid resolution.
+        """
+        colormap = build_colormap(colors, data, caption)
+        features = contour_features(data, levels, self.nepal_bounds, self.resolution,
+                                    zoom=zoom, kind=kind)
+        
+        def style(feature):
+            color = colormap(feature['properties']['level'])
+            if kind == 'polygons':
+                return {'fillColor': color, 'fillOpacity': 0.35, 'color': color, 'weight': 0.5}
+            return {'color': color, 'weight': 1.5}
+        
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': features},
+            name=name or caption,
+            style_function=style,
+            tooltip=folium.GeoJsonTooltip(fields=['level'], aliases=[caption])
+        ).add_to(m)
+        
+        colormap.add_to(m)
+        
     def add_elevation_layer(self, m, elevation_data):
         """Add elevation raster layer to the map"""
         if elevation_data is not None:
-            # Create elevation colormap with more realistic colors
-            elevation_colormap = cm.LinearColormap(
-                colors=['#a6cee3', '#1f78b4', '#b2df8a', '#33a02c', '#fb9a99', '#e31a1c'],
-                vmin=elevation_data.min(),
-                vmax=elevation_data.max(),
-                caption='Elevation (m)'
-            )
-            
-            # Add elevation layer
-            folium.raster_layers.ImageOverlay(
-                elevation_data,
-                bounds=[[self.nepal_bounds['south'], self.nepal_bounds['west']],
-                       [self.nepal_bounds['north'], self.nepal_bounds['east']]],
-                colormap=elevation_colormap,
-                opacity=0.7
-            ).add_to(m)
-            
-            elevation_colormap.add_to(m)
+            self.add_raster_overlay(m, elevation_data, ELEVATION_COLORS, 'Elevation (m)')
             
     def add_temperature_layer(self, m, temperature_data, year):
         """Add temperature prediction layer to the map"""
         if temperature_data is not None:
-            # Create temperature colormap with more realistic colors
-            temp_colormap = cm.LinearColormap(
-                colors=['#313695', '#4575b4', '#74add1', '#abd9e9', '#e0f3f8', 
-                       '#ffffbf', '#fee090', '#fdae61', '#f46d43', '#d73027'],
-                vmin=temperature_data.min(),
-                vmax=temperature_data.max(),
-                caption=f'Temperature (°C) - {year}'
-            )
-            
-            # Add temperature layer
-            folium.raster_layers.ImageOverlay(
-                temperature_data,
-                bounds=[[self.nepal_bounds['south'], self.nepal_bounds['west']],
-                       [self.nepal_bounds['north'], self.nepal_bounds['east']]],
-                colormap=temp_colormap,
-                opacity=0.7
-            ).add_to(m)
-            
-            temp_colormap.add_to(m)
+            self.add_raster_overlay(m, temperature_data, TEMPERATURE_COLORS,
+                                    f'Temperature (°C) - {year}')
             
     def add_city_markers(self, m, cities_data):
         """Add city markers with temperature predictions"""
@@ -190,9 +466,21 @@ class NepalMapVisualizer:
                 fill_color='red'
             ).add_to(m)
             
-    def create_interactive_map(self, cities_data, elevation_data=None, temperature_data=None, year=None):
-        """Create an interactive map with all layers"""
+    def create_interactive_map(self, cities_data, elevation_data=None, temperature_data=None, year=None,
+                               layer_mode='image'):
+        """
+        Create an interactive map with all layers
+        
+        layer_mode selects how the rasters are shown: 'image' embeds them in the
+        page, 'tiles' serves XYZ tiles from the local tile server and
+        'contours' draws compact contour polygons.
+        """
         m = self.create_base_map()
+        add_raster = {
+            'image': self.add_raster_overlay,
+            'tiles': self.add_raster_tiles,
+            'contours': self.add_contour_layer
+        }[layer_mode]
         
         # Add base layers
         folium.TileLayer('CartoDB positron', name='Base Map').add_to(m)
@@ -201,44 +489,12 @@ class NepalMapVisualizer:
         
         # Add elevation layer with enhanced visualization
         if elevation_data is not None:
-            elevation_colormap = cm.LinearColormap(
-                colors=['#a6cee3', '#1f78b4', '#b2df8a', '#33a02c', '#fb9a99', '#e31a1c'],
-                vmin=elevation_data.min(),
-                vmax=elevation_data.max(),
-                caption='Elevation (m)'
-            )
-            
-            folium.raster_layers.ImageOverlay(
-                elevation_data,
-                bounds=[[self.nepal_bounds['south'], self.nepal_bounds['west']],
-                       [self.nepal_bounds['north'], self.nepal_bounds['east']]],
-                colormap=elevation_colormap,
-                opacity=0.7,
-                name='Elevation'
-            ).add_to(m)
-            
-            elevation_colormap.add_to(m)
+            add_raster(m, elevation_data, ELEVATION_COLORS, 'Elevation (m)', name='Elevation')
             
         # Add temperature layer with enhanced visualization
         if temperature_data is not None:
-            temp_colormap = cm.LinearColormap(
-                colors=['#313695', '#4575b4', '#74add1', '#abd9e9', '#e0f3f8', 
-                       '#ffffbf', '#fee090', '#fdae61', '#f46d43', '#d73027'],
-                vmin=temperature_data.min(),
-                vmax=temperature_data.max(),
-                caption=f'Temperature (°C) - {year}'
-            )
-            
-            folium.raster_layers.ImageOverlay(
-                temperature_data,
-                bounds=[[self.nepal_bounds['south'], self.nepal_bounds['west']],
-                       [self.nepal_bounds['north'], self.nepal_bounds['east']]],
-                colormap=temp_colormap,
-                opacity=0.7,
-                name='Temperature'
-            ).add_to(m)
-            
-            temp_colormap.add_to(m)
+            add_raster(m, temperature_data, TEMPERATURE_COLORS,
+                       f'Temperature (°C) - {year}', name='Temperature')
             
         # Add city markers with enhanced visualization
         marker_cluster = MarkerCluster(name='Cities').add_to(m)
@@ -255,7 +511,7 @@ class NepalMapVisualizer:
             """
             
             # Create circle marker with size based on temperature
-            radius = 8 + (data['temperature'] - temperature_data.min()) / 2
+            radius = 8 + (data['temperature'] - np.nanmin(temperature_data)) / 2
             
             folium.CircleMarker(
                 location=[data['lat'], data['lon']],
@@ -290,26 +546,297 @@ class NepalMapVisualizer:
         
         return m
         
+    def get_temperature_terms(self, elevation_data=None):
+        """
+        Latitude factor and lapse-rate elevation effect of every cell inside
+        the country, used by the temperature rasters and computed once per
+        elevation grid
+        """
+        if elevation_data is None:
+            elevation_data = self.elevation_data
+        
+        cached = getattr(self, '_temperature_terms', None)
+        if cached is None or cached[0] is not elevation_data:
+            lats, lons = self.get_grid_axes()
+            rows = self.mask_indices // len(lons)
+            
+            # Base temperature adjusted for latitude
+            lat_factor = (1 - np.abs(lats[rows] - 28.3949) / 10).astype(np.float32)  # Center at Nepal's latitude
+            
+            # Elevation effect (temperature decreases with height)
+            elevation_effect = (-LAPSE_RATE / 1000 * self.compress(elevation_data)).astype(np.float32)
+            
+            cached = (elevation_data, lat_factor, elevation_effect)
+            self._temperature_terms = cached
+        
+        return cached[1], cached[2]
+        
+    def generate_temperature_cube(self, base_temps, elevation_data=None, compressed=False):
+        """
+        Generate temperature rasters for several base temperatures at once
+        
+        Args:
+            base_temps (array-like): One base temperature per forecast year or scenario
+            elevation_data (np.ndarray, optional): Elevation grid, defaults to elevation_data
+            compressed (bool): Return only the cells inside the country, see compress()
+        
+        Returns:
+            np.ndarray: float32 cube of shape (len(base_temps), rows, cols), NaN
+                        outside the country, or (len(base_temps), cells) if compressed
+        """
+        lat_factor, elevation_effect = self.get_temperature_terms(elevation_data)
+        base_temps = np.asarray(base_temps, dtype=np.float32).reshape(-1, 1)
+        
+        cube = np.empty((base_temps.shape[0], len(elevation_effect)), dtype=np.float32)
+        np.multiply(base_temps, lat_factor, out=cube)
+        cube += elevation_effect
+        return cube if compressed else self.expand(cube)
+        
+    def get_station_weights(self, stations, k=8, power=2.0):
+        """
+        Neighbour indices and inverse-distance weights from every cell inside
+        the country to its k nearest stations; computed once per station set
+        and grid and shared like the elevation grids
+        
+        Args:
+            stations (StationRegistry): Stations to interpolate from
+            k (int): Number of neighbouring stations per cell
+            power (float): Distance exponent
+        
+        Returns:
+            tuple: (station positions int32, weights float32), both (cells, k)
+        """
+        params = {
+            'bounds': self.nepal_bounds,
+            'resolution': self.resolution,
+            'boundary': self.load_country_boundary(),
+            'stations': hash_array(stations.table[['lat', 'lon']].to_numpy(dtype=float)),
+            'k': k,
+            'power': power
+        }
+        key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        
+        neighbours = {}
+        def query():
+            # Both grids come from one neighbour search
+            if not neighbours:
+                lats, lons = self.get_grid_axes()
+                rows, cols = np.divmod(self.mask_indices, len(lons))
+                distances, indices = stations.query_nearest(lats[rows], lons[cols], k)
+                # Clamp so a cell on top of a station takes (almost) its value
+                weights = 1 / np.maximum(distances, 1e-3) ** power
+                weights /= weights.sum(axis=1, keepdims=True)
+                neighbours['indices'] = indices.astype(np.int32)
+                neighbours['weights'] = weights.astype(np.float32)
+            return neighbours
+        
+        indices = _load_shared_grid('idw', f'{key}-indices', lambda: query()['indices'])
+        weights = _load_shared_grid('idw', f'{key}-weights', lambda: query()['weights'])
+        return indices, weights
+        
+    def interpolation_cache_key(self, stations, k=8, power=2.0):
+        """Digest of everything besides the station values that determines interpolate_stations()"""
+        table = stations.table[['lat', 'lon', 'elevation']]
+        params = {
+            'elevation': self.elevation_cache_key(),
+            'stations': list(map(str, table.index)),
+            'station_table': hash_array(table.to_numpy(dtype=float)),
+            'k': k,
+            'power': power,
+            'lapse_rate': LAPSE_RATE
+        }
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    @profiled('map.interpolate_stations')
+    def interpolate_stations(self, stations, station_values, elevation_data=None, k=8, power=2.0,
+                             compressed=False):
+        """
+        Grid station temperatures with lapse-rate-detrended inverse distance weighting
+        
+        Station values are reduced to sea level, interpolated with the cached
+        weights from get_station_weights, and lifted back to each cell's own
+        elevation, so valleys and ridges between stations keep their contrast.
+        Missing station elevations are sampled from the grid; stations outside
+        it are skipped.
+        
+        Args:
+            stations (StationRegistry): Stations matching the columns of station_values
+            station_values (array-like): (years, stations) forecasts, or one value per station
+            elevation_data (np.ndarray, optional): Elevation grid, defaults to elevation_data
+            k (int): Number of neighbouring stations per cell
+            power (float): Distance exponent
+            compressed (bool): Return only the cells inside the country, see compress()
+        
+        Returns:
+            np.ndarray: float32 cube of shape (years, rows, cols), NaN outside
+                        the country, or (years, cells) if compressed
+        """
+        values = np.atleast_2d(np.asarray(station_values, dtype=np.float32))
+        if values.shape[1] != len(stations):
+            raise ValueError(f"Expected {len(stations)} station columns, got {values.shape[1]}")
+        
+        # Stations without a recorded elevation take it from the grid; those
+        # off the grid cannot be reduced to sea level and are left out
+        stations = StationRegistry(stations.table).fill_elevation(self.sample_elevation)
+        known = stations.table['elevation'].notna().to_numpy()
+        if not known.any():
+            raise ValueError("No station has a known elevation")
+        if not known.all():
+            stations = StationRegistry(stations.table[known])
+            values = values[:, known]
+        
+        indices, weights = self.get_station_weights(stations, k, power)
+        _, elevation_effect = self.get_temperature_terms(elevation_data)
+        
+        station_elevation = stations.table['elevation'].to_numpy(dtype=float)
+        sea_level = values + (LAPSE_RATE / 1000 * station_elevation).astype(np.float32)
+        
+        # One gather per neighbour rank, all years at once
+        cube = np.zeros((values.shape[0], len(elevation_effect)), dtype=np.float32)
+        for j in range(indices.shape[1]):
+            cube += weights[:, j] * sea_level[:, indices[:, j]]
+        cube += elevation_effect
+        return cube if compressed else self.expand(cube)
+        
+    def get_zone_grid(self, zones='regions'):
+        """
+        Label grid (-1 outside any zone) and zone names for a zone set,
+        rasterized once and cached; 'regions' are the physiographic bands
+        """
+        if not hasattr(self, '_zone_grids'):
+            self._zone_grids = {}
+        if zones not in self._zone_grids:
+            if zones != 'regions':
+                raise KeyError(f"Unknown zone set: {zones}")
+            lats, lons = self.get_grid_axes()
+            names = list(self.regions.keys())
+            row_labels = np.full(len(lats), -1, dtype=np.int16)
+            for label, reg_data in enumerate(self.regions.values()):
+                in_band = (lats >= reg_data['bounds']['south']) & (lats < reg_data['bounds']['north'])
+                row_labels[in_band] = label
+            self.add_zone_grid('regions', np.repeat(row_labels[:, None], len(lons), axis=1), names)
+        return self._zone_grids[zones][:2]
+        
+    def add_zone_grid(self, zones, labels, names):
+        """
+        Register a label grid (e.g. rasterized districts) for zonal statistics
+        
+        Args:
+            zones (str): Name of the zone set
+            labels (np.ndarray): Integer grid matching the raster shape, -1 outside all zones
+            names (list): Zone name for each label value
+        """
+        if not hasattr(self, '_zone_grids'):
+            self._zone_grids = {}
+        labels = np.where(self.country_mask, labels, -1)
+        
+        # Sort the cells by label once so every statistic is a segmented reduction
+        flat = labels.ravel()
+        cells = np.flatnonzero(flat >= 0)
+        order = cells[np.argsort(flat[cells], kind='stable')]
+        sorted_labels = flat[order]
+        starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]]) if len(order) else np.array([], dtype=np.intp)
+        
+        self._zone_grids[zones] = (labels, list(names), order, starts, sorted_labels[starts])
+        
+    @profiled('map.zonal_statistics')
+    def zonal_statistics(self, data, zones='regions', percentiles=(10, 50, 90), compressed=False):
+        """
+        Per-zone count, mean, min, max and percentiles of a raster or raster cube
+        
+        Args:
+            data (np.ndarray): Raster (rows x cols) or cube (layers x rows x cols)
+            zones (str): Zone set registered with add_zone_grid, default 'regions'
+            percentiles (tuple): Percentiles to compute
+            compressed (bool): data holds only the cells inside the country,
+                               (cells,) or (layers x cells), see compress()
+        
+        Returns:
+            pd.DataFrame: One row per zone (and layer for cubes); NaN cells are ignored
+        """
+        self.get_zone_grid(zones)
+        labels, names, order, starts, zone_ids = self._zone_grids[zones]
+        
+        data = np.asarray(data)
+        is_cube = data.ndim == (2 if compressed else 3)
+        if not len(order):
+            return pd.DataFrame()
+        if compressed:
+            # Zones only cover cells inside the country, so every cell has a compressed position
+            order = np.searchsorted(self.mask_indices, order)
+        values = np.take(data.reshape(data.shape[0] if is_cube else 1, -1), order, axis=1)
+        
+        finite = np.isfinite(values)
+        counts = np.add.reduceat(finite, starts, axis=1)
+        if not finite.all():
+            values = np.where(finite, values, np.nan)
+            filled = np.where(finite, values, 0)
+            low, high = np.where(finite, values, np.inf), np.where(finite, values, -np.inf)
+        else:
+            filled = low = high = values
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.add.reduceat(filled, starts, axis=1, dtype=np.float64) / counts
+        mins = np.minimum.reduceat(low, starts, axis=1).astype(np.float64)
+        maxs = np.maximum.reduceat(high, starts, axis=1).astype(np.float64)
+        
+        # Percentiles per zone, vectorized across layers
+        ends = np.r_[starts[1:], values.shape[1]]
+        pcts = np.full((len(percentiles), values.shape[0], len(starts)), np.nan)
+        if percentiles:
+            for z, (start, end) in enumerate(zip(starts, ends)):
+                if counts[:, z].all() and counts[:, z].min() == end - start:
+                    pcts[:, :, z] = np.percentile(values[:, start:end], percentiles, axis=1)
+                elif counts[:, z].any():
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore', RuntimeWarning)
+                        pcts[:, :, z] = np.nanpercentile(values[:, start:end], percentiles, axis=1)
+        
+        empty = counts == 0
+        mins[empty] = np.nan
+        maxs[empty] = np.nan
+        
+        n_layers = values.shape[0]
+        stats = pd.DataFrame({
+            'zone': np.tile([names[i] for i in zone_ids], n_layers),
+            'count': counts.ravel(),
+            'mean': means.ravel(),
+            'min': mins.ravel(),
+            'max': maxs.ravel(),
+            **{f'p{q:g}': pcts[i].ravel() for i, q in enumerate(percentiles)}
+        })
+        if is_cube:
+            stats.insert(0, 'layer', np.repeat(np.arange(n_layers), len(starts)))
+        return stats
+        
+    def map_cache_key(self, cities_data, elevation_data=None, temperature_data=None, year=None,
+                      layer_mode='image'):
+        """Digest of everything that affects the rendered interactive map"""
+        params = {
+            'cities': cities_data,
+            'elevation': None if elevation_data is None else hash_array(elevation_data),
+            'temperature': None if temperature_data is None else hash_array(temperature_data),
+            'year': year,
+            'layer_mode': layer_mode,
+            'bounds': self.nepal_bounds,
+            'resolution': self.resolution,
+            # Tile layers embed the server URL, whose port changes between processes
+            'tile_url': get_tile_server().base_url if layer_mode == 'tiles' else None
+        }
+        return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        
+    def render_interactive_map(self, cities_data, elevation_data=None, temperature_data=None, year=None,
+                               layer_mode='image'):
+        """Return the interactive map as HTML, reusing the render for unchanged layers"""
+        key = self.map_cache_key(cities_data, elevation_data, temperature_data, year, layer_mode)
+        html = _map_html_cache.get(key)
+        if html is None:
+            with profile_stage('map.build', layer_mode=layer_mode):
+                m = self.create_interactive_map(cities_data, elevation_data, temperature_data, year, layer_mode)
+            with profile_stage('map.serialize', layer_mode=layer_mode):
+                html = m._repr_html_()
+            _map_html_cache.put(key, html)
+        return html
+        
     def generate_temperature_raster(self, base_temp, elevation_data):
         """Generate temperature raster data based on elevation and latitude"""
-        # Create temperature grid
-        resolution = 0.01
-        lats = np.arange(self.nepal_bounds['south'], self.nepal_bounds['north'], resolution)
-        lons = np.arange(self.nepal_bounds['west'], self.nepal_bounds['east'], resolution)
-        temperature = np.zeros((len(lats), len(lons)))
-        
-        # Calculate temperature based on elevation and latitude
-        for i, lat in enumerate(lats):
-            for j, lon in enumerate(lons):
-                # Base temperature adjusted for latitude
-                lat_factor = 1 - abs(lat - 28.3949) / 10  # Center at Nepal's latitude
-                
-                # Elevation effect (temperature decreases with height)
-                elevation = elevation_data[i, j]
-                lapse_rate = 6.5  # °C per 1000m
-                elevation_effect = -lapse_rate * elevation / 1000
-                
-                # Combine effects
-                temperature[i, j] = base_temp * lat_factor + elevation_effect
-                
-        return temperature 
\ No newline at end of file
+        return self.generate_temperature_cube([base_temp], elevation_data)[0]
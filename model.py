@@ -6,13 +6,23 @@ from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from sklearn.ensemble import RandomForestRegressor
 import warnings
+import threading
+from profiling import profile_stage, profiled
 warnings.filterwarnings('ignore')
 
 class ClimatePredictor:
+    # Identifies the model configuration in stored forecasts; change it
+    # whenever the models or ensemble weights below change
+    MODEL_KEY = 'ensemble-v1:sarima(2,1,2)(1,1,1,12):rf100:w0.6'
+
     def __init__(self):
+        self.temp_model = None
         self.city_models = {}
         self.scaler = StandardScaler()
         self.feature_importance = {}
+        # Fitted SARIMAX results reuse internal buffers while forecasting, so
+        # sessions sharing this predictor through the pool take turns
+        self._forecast_lock = threading.Lock()
         
     def prepare_data(self, climate_data):
         """Prepare data for time series prediction with advanced features"""
@@ -39,26 +49,30 @@ class ClimatePredictor:
         
     def train(self, climate_data, city_name=None):
         """Train the temperature prediction model with multiple models"""
+        city_label = city_name or 'base'
         try:
             # Prepare data
-            df = self.prepare_data(climate_data)
+            with profile_stage('model.prepare_data', city=city_label):
+                df = self.prepare_data(climate_data)
             
             # Train multiple models
             models = {}
             
             # 1. SARIMA model for seasonal patterns
-            sarima_model = SARIMAX(
-                df['temperature'],
-                order=(2,1,2),
-                seasonal_order=(1,1,1,12)
-            )
-            models['sarima'] = sarima_model.fit(disp=False)
+            with profile_stage('model.sarimax_fit', city=city_label):
+                sarima_model = SARIMAX(
+                    df['temperature'],
+                    order=(2,1,2),
+                    seasonal_order=(1,1,1,12)
+                )
+                models['sarima'] = sarima_model.fit(disp=False)
             
             # 2. Random Forest for non-linear patterns
             rf_features = ['year_sin', 'year_cos', 'temp_rolling_mean', 
                           'temp_rolling_std', 'temp_diff', 'temp_diff2']
             rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-            rf_model.fit(df[rf_features], df['temperature'])
+            with profile_stage('model.rf_fit', city=city_label):
+                rf_model.fit(df[rf_features], df['temperature'])
             models['rf'] = rf_model
             
             # Store feature importance
@@ -77,6 +91,21 @@ class ClimatePredictor:
             print(f"Error training model for {city_name if city_name else 'base'}: {e}")
             return False
             
+    def is_trained(self, city_name=None):
+        """Check whether a model has been trained for the given city (or base)"""
+        if city_name:
+            return city_name in self.city_models
+        return self.temp_model is not None
+        
+    @staticmethod
+    def get_forecast_years(years_to_predict):
+        """Get the calendar years covered by a forecast of the given length"""
+        last_year = pd.Timestamp.now().year
+        return pd.date_range(start=str(last_year + 1), 
+                             periods=years_to_predict, 
+                             freq='Y')
+            
+    @profiled('model.predict')
     def predict(self, years_to_predict, city_name=None):
         """Make temperature predictions using ensemble of models"""
         try:
@@ -88,21 +117,20 @@ class ClimatePredictor:
             predictions = {}
             
             # SARIMA predictions
-            sarima_forecast = models['sarima'].forecast(steps=years_to_predict)
+            with self._forecast_lock:
+                sarima_forecast = models['sarima'].forecast(steps=years_to_predict)
             predictions['sarima'] = sarima_forecast
             
             # Random Forest predictions
-            last_year = pd.Timestamp.now().year
-            future_years = pd.date_range(start=str(last_year + 1), 
-                                       periods=years_to_predict, 
-                                       freq='Y')
+            future_years = self.get_forecast_years(years_to_predict)
             
-            # Prepare features for RF prediction
+            # Prepare features for RF prediction (a one-year horizon has no
+            # spread; its NaN std would make the forest reject the input)
             future_features = pd.DataFrame({
                 'year_sin': np.sin(2 * np.pi * future_years.year / 100),
                 'year_cos': np.cos(2 * np.pi * future_years.year / 100),
                 'temp_rolling_mean': sarima_forecast.mean(),
-                'temp_rolling_std': sarima_forecast.std(),
+                'temp_rolling_std': np.nan_to_num(sarima_forecast.std()),
                 'temp_diff': 0,
                 'temp_diff2': 0
             })
@@ -1,13 +1,37 @@
 """
 This file makes the pages directory a Python package.
+
+Page modules are imported only when a page is first shown, so opening a
+light page such as About does not import the ML and GIS stacks that the
+Predictions page needs.
 """
 
-# Import all page modules
-from .trend_pattern import show_trend_pattern
-from .overview import show_overview
-from .data_analysis import show_data_analysis
-from .prediction import show_prediction
-from .about import show_about
+import importlib
+
+# Page label -> (module, function, inputs the function takes), in navigation order
+PAGES = {
+    "Overview": ('pages.overview', 'show_overview', ('climate_data',)),
+    "Data Analysis": ('pages.data_analysis', 'show_data_analysis', ('climate_data', 'features')),
+    "Trends & Patterns": ('pages.trend_pattern', 'show_trend_pattern', ('climate_data', 'features')),
+    "Predictions": ('pages.prediction', 'show_prediction', ('climate_data', 'features')),
+    "About": ('pages.about', 'show_about', ()),
+}
+
+def get_page(name):
+    """Return a page's show function, importing its module on first use"""
+    module_name, function_name, _ = PAGES[name]
+    return getattr(importlib.import_module(module_name), function_name)
+
+def get_page_inputs(name):
+    """Names of the inputs a page's show function takes, in order"""
+    return PAGES[name][2]
+
+def __getattr__(name):
+    # Keep 'from pages import show_overview' working without eager imports
+    for page, (_, function_name, _) in PAGES.items():
+        if function_name == name:
+            return get_page(page)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Define what should be imported when using 'from pages import *'
 __all__ = [
@@ -16,4 +40,4 @@ __all__ = [
     'show_data_analysis',
     'show_prediction',
     'show_about'
-] 
\ No newline at end of file
+]
@@ -1,7 +1,8 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go   
-from visualizations import plot_climate_timeseries
+from figure_cache import cached_png, cached_plotly
+from chart_aggregates import histogram_trace
 
 def show_data_analysis(climate_data, features):
    
@@ -13,41 +14,53 @@ def show_data_analysis(climate_data, features):
     st.dataframe(climate_data)
      
     # Climate time series plot call from visualizations.py
-    fig = plot_climate_timeseries(climate_data)
-    st.pyplot(fig)
+    # Rendered to PNG once per dataset; matplotlib is imported only to render
+    def render_timeseries():
+        from visualizations import plot_climate_timeseries
+        return plot_climate_timeseries(climate_data)
+    png = cached_png('climate_timeseries', climate_data, render_timeseries)
+    if png is not None:
+        st.image(png, use_column_width=True)
     
 
     
     # Correlation heatmap
     st.subheader("Feature Correlations")
-    corr = features.corr()
-    fig_corr = px.imshow(corr, 
-                        title="Correlation Matrix",
-                        color_continuous_scale='RdBu')
+    fig_corr = cached_plotly(
+        'feature_correlations', features,
+        lambda: px.imshow(features.corr(), 
+                          title="Correlation Matrix",
+                          color_continuous_scale='RdBu')
+    )
     st.plotly_chart(fig_corr)
     
     # Seasonal patterns
     st.subheader("Seasonal Patterns")
-    seasonal_temp = features.groupby('month')['temperature'].mean()
-    seasonal_precip = features.groupby('month')['precipitation'].mean()
-    
-    fig_seasonal = go.Figure()
-    fig_seasonal.add_trace(go.Scatter(x=seasonal_temp.index, y=seasonal_temp,
-                                    name="Temperature", yaxis="y1"))
-    fig_seasonal.add_trace(go.Bar(x=seasonal_precip.index, y=seasonal_precip,
-                                name="Precipitation", yaxis="y2"))
-    
-    fig_seasonal.update_layout(
-        title="Monthly Temperature and Precipitation Patterns",
-        yaxis=dict(title="Temperature (°C)"),
-        yaxis2=dict(title="Precipitation (mm)", overlaying="y", side="right")
-    )
-    st.plotly_chart(fig_seasonal)
+    def build_seasonal():
+        seasonal_temp = features.groupby('month')['temperature'].mean()
+        seasonal_precip = features.groupby('month')['precipitation'].mean()
+        
+        fig_seasonal = go.Figure()
+        fig_seasonal.add_trace(go.Scatter(x=seasonal_temp.index, y=seasonal_temp,
+                                        name="Temperature", yaxis="y1"))
+        fig_seasonal.add_trace(go.Bar(x=seasonal_precip.index, y=seasonal_precip,
+                                    name="Precipitation", yaxis="y2"))
+        
+        fig_seasonal.update_layout(
+            title="Monthly Temperature and Precipitation Patterns",
+            yaxis=dict(title="Temperature (°C)"),
+            yaxis2=dict(title="Precipitation (mm)", overlaying="y", side="right")
+        )
+        return fig_seasonal
+    st.plotly_chart(cached_plotly('seasonal_patterns', features[['month', 'temperature', 'precipitation']], build_seasonal))
     
     # Temperature distribution plot
     st.subheader("Temperature Distribution Over Time")
-    fig_temp = px.histogram(climate_data, x="temperature", 
-                          nbins=30, 
-                          title="Temperature Distribution",
-                          color_discrete_sequence=['#FF9B9B'])
+    fig_temp = cached_plotly(
+        'temperature_histogram', climate_data,
+        lambda: go.Figure(
+            histogram_trace(climate_data['temperature'], nbins=30, color='#FF9B9B'),
+            layout=dict(title="Temperature Distribution", xaxis_title="temperature", yaxis_title="count")
+        )
+    )
     st.plotly_chart(fig_temp)
\ No newline at end of file
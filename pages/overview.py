@@ -1,6 +1,10 @@
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
+from figure_cache import cached_plotly
+from chart_aggregates import histogram_trace, binned_scatter_traces
+from downsampling import downsample_figure
 
 def show_overview(climate_data):
     st.write("## Climate Data Overview")
@@ -9,6 +13,8 @@ def show_overview(climate_data):
             The data is sourced from the World Bank Climate Data API.
             """)
     
+    full_resolution = st.session_state.get('full_resolution_charts', False)
+
     # Key metrics display
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -38,60 +44,71 @@ def show_overview(climate_data):
     # Temperature trend analysis
     st.subheader("Temperature Distribution Analysis")
     
-    # Create temperature histogram with improved styling
-    temp_fig = px.histogram(
-        climate_data, 
-        x="temperature",
-        nbins=15,  # Increased bins for more granular view
-        title="Temperature Distribution Over Time (1990-2023)",
-        labels={
-            'temperature': 'Temperature (°C)',
-            'count': 'Number of Observations'
-        },
-        color_discrete_sequence=['#4B8BBE']  # Changed to blue
-    )
+    def build_temperature_histogram():
+        # Create temperature histogram with improved styling
+        temp_fig = go.Figure(histogram_trace(
+            climate_data['temperature'],
+            nbins=15,  # Increased bins for more granular view
+            color='#4B8BBE'  # Changed to blue
+        ))
+        temp_fig.update_layout(
+            title="Temperature Distribution Over Time (1990-2023)",
+            xaxis_title='Temperature (°C)',
+            yaxis_title='Number of Observations'
+        )
 
-    # Enhance the layout
-    temp_fig.update_layout(
-        bargap=0.1,  # Add space between bars
-        plot_bgcolor='white',  # Clean white background
-        title_x=0.5,  # Center the title
-        title_font_size=20
-    )
+        # Enhance the layout
+        temp_fig.update_layout(
+            bargap=0.1,  # Add space between bars
+            plot_bgcolor='white',  # Clean white background
+            title_x=0.5,  # Center the title
+            title_font_size=20
+        )
 
-    # Add mean line with clear annotation
-    temp_fig.add_vline(
-        x=avg_temp,
-        line_dash="dash",
-        line_color="red",
-        line_width=2,
-        annotation_text=f"Average Temperature: {avg_temp:.1f}°C",
-        annotation_position="top right"
-    )
+        # Add mean line with clear annotation
+        temp_fig.add_vline(
+            x=avg_temp,
+            line_dash="dash",
+            line_color="red",
+            line_width=2,
+            annotation_text=f"Average Temperature: {avg_temp:.1f}°C",
+            annotation_position="top right"
+        )
+        return temp_fig
 
-    # Display the plot
+    # Display the plot (rebuilt only when the data changes)
+    temp_fig = cached_plotly('overview_temperature_histogram', climate_data, build_temperature_histogram)
     st.plotly_chart(temp_fig, use_container_width=True)
 
     # Precipitation analysis
     st.subheader("Annual Precipitation Pattern")
-    precip_fig = px.line(climate_data, x='year', y='precipitation',
-                        title='Annual Precipitation Trend (1990-2023)',
-                        labels={'year': 'Year', 'precipitation': 'Precipitation (mm)'},
-                        color_discrete_sequence=['#4B8BBE'])
-    precip_fig.add_hline(y=avg_precip, line_dash="dash", line_color="blue",
-                        annotation_text=f"Mean: {avg_precip:.0f}mm")
-    st.plotly_chart(precip_fig)
+    def build_precipitation_trend():
+        precip_fig = px.line(climate_data, x='year', y='precipitation',
+                            title='Annual Precipitation Trend (1990-2023)',
+                            labels={'year': 'Year', 'precipitation': 'Precipitation (mm)'},
+                            color_discrete_sequence=['#4B8BBE'])
+        precip_fig.add_hline(y=avg_precip, line_dash="dash", line_color="blue",
+                            annotation_text=f"Mean: {avg_precip:.0f}mm")
+        return downsample_figure(precip_fig, enabled=not full_resolution)
+    st.plotly_chart(cached_plotly('overview_precipitation_trend', climate_data, build_precipitation_trend,
+                                  full_resolution=full_resolution))
 
-    # Climate correlation
+    # Climate correlation (binned on the server, with a least-squares trendline)
     st.subheader("Temperature-Precipitation Relationship")
-    corr = climate_data['temperature'].corr(climate_data['precipitation'])
-    scatter_fig = px.scatter(climate_data, x='temperature', y='precipitation',
-                           title=f'Temperature vs Precipitation (Correlation: {corr:.2f})',
-                           labels={'temperature': 'Temperature (°C)', 
-                                  'precipitation': 'Precipitation (mm)'},
-                           trendline='ols',
-                           color_discrete_sequence=['#2E8B57'])
-    st.plotly_chart(scatter_fig)
+    def build_scatter():
+        corr = climate_data['temperature'].corr(climate_data['precipitation'])
+        scatter_fig = go.Figure(binned_scatter_traces(
+            climate_data['temperature'],
+            climate_data['precipitation'],
+            color='#2E8B57'
+        ))
+        scatter_fig.update_layout(
+            title=f'Temperature vs Precipitation (Correlation: {corr:.2f})',
+            xaxis_title='Temperature (°C)',
+            yaxis_title='Precipitation (mm)'
+        )
+        return scatter_fig
+    st.plotly_chart(cached_plotly('overview_temperature_precipitation', climate_data, build_scatter))
 
     # Statistical summary
     st.subheader("Statistical Summary")
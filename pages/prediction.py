@@ -1,12 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from visualizations import plot_prediction_history, plot_climate_timeseries, plot_seasonal_patterns
 import sys
 import os
-import folium
-from folium.plugins import MarkerCluster
+import hashlib
 
 # Add parent directory to Python path
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -14,299 +13,592 @@ if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 from model import ClimatePredictor
-from city_data import CITY_DATA, generate_city_temperatures, get_city_coordinates
+from forecast_store import ForecastStore
+from cache_utils import hash_dataframe, hash_array
+from city_data import get_station_registry, generate_all_city_temperatures
+from station_registry import StationRegistry
 from map_utils import NepalMapVisualizer
+from tile_server import tiles_reachable
+from chart_aggregates import binned_scatter_traces
+from downsampling import downsample_figure
+from profiling import profile_stage
+from task_graph import TaskGraph
+from resource_pool import get_resource, freeze_arrays
 
-def show_prediction(climate_data, features):
-    st.subheader("Nepal City Climate Predictions")
-    
-    # Initialize the predictor and map visualizer
-    predictor = ClimatePredictor()
+# Views of the page; only the selected one is computed
+VIEWS = ["City Forecast", "Map View", "Model Analysis", "Comparison"]
+METRIC_VIEWS = ["Model Comparison", "Elevation Analysis", "Trend Analysis"]
+
+def build_map_visualizer():
+    """
+    Visualizer with its lazily built grids populated and made read-only,
+    so sessions sharing it only read
+    """
     map_viz = NepalMapVisualizer()
-    
-    # Train base model
-    with st.spinner('Training prediction model...'):
-        if predictor.train(climate_data):
-            st.success('Base model trained successfully!')
-        else:
-            st.error('Error training the base model. Please try again.')
+    if map_viz.elevation_data is not None:
+        map_viz.get_temperature_terms()
+        map_viz.get_zone_grid('regions')
+        map_viz.mask_indices
+    return freeze_arrays(map_viz)
+
+class PredictionState:
+    """
+    Per-session view of the Predictions page's artifacts
+
+    Kept in st.session_state and rebuilt only when the climate data changes.
+    Trained models, the map visualizer (with its elevation grid) and
+    gridded forecasts come from the process-wide resource pool, so each is
+    built once however many sessions ask for it; the session's artifact
+    graph only runs independent lookups concurrently and remembers their
+    results. Artifact names carry the forecast length and city they depend
+    on, e.g. 'forecast:5:Pokhara' or 'temperature_cube:5'.
+    """
+
+    MODEL_KEY = ClimatePredictor.MODEL_KEY
+
+    def __init__(self, climate_data, data_hash):
+        self.climate_data = climate_data
+        self.data_hash = data_hash
+        self.store = ForecastStore()
+        self.map_viz = get_resource(('map_visualizer',), build_map_visualizer)
+        self.stations = get_station_registry()
+
+        # Elevation-adjusted history for every city in one pass
+        def split_history():
+            city_temperatures = generate_all_city_temperatures(climate_data, self.stations.table)
+            return {
+                city: group.reset_index(drop=True)
+                for city, group in city_temperatures.groupby('city', observed=True)
+            }
+        self.city_history = get_resource(('city_history', data_hash), split_history)
+
+        self._cube_years = None
+        self.graph = TaskGraph()
+        self.graph.add('elevation', lambda: self.map_viz.elevation_data)
+
+    def training_hash(self, city_name=None):
+        """
+        Digest of a model's training data: the climate data, plus for a city
+        model the station position and elevation its history is derived from,
+        which CLIMATE_APP_STATIONS can change under the same city name
+        """
+        if not city_name:
+            return self.data_hash
+        station = self.stations.table.loc[[city_name], ['lat', 'lon', 'elevation']]
+        digest = hashlib.sha1(self.data_hash.encode())
+        digest.update(hash_array(station.to_numpy(dtype=float)).encode())
+        return digest.hexdigest()
+
+    def get_model(self, city_name=None):
+        """
+        Shared predictor trained for the base or city model, or None if
+        training failed
+
+        Every artifact that needs a model goes through here, so concurrent
+        graph nodes (a city's forecasts and its feature importance) and
+        concurrent sessions all wait on a single training run per model.
+        """
+        def train():
+            predictor = ClimatePredictor()
+            train_data = self.city_history[city_name] if city_name else self.climate_data
+            return predictor if predictor.train(train_data, city_name) else None
+
+        return get_resource(('model', self.MODEL_KEY, self.training_hash(city_name), city_name), train)
+
+    def get_forecast(self, years_to_predict, city_name=None):
+        """Query the forecast store, training and predicting only on a miss"""
+        def compute():
+            predictor = self.get_model(city_name)
+            if predictor is None:
+                return None
+            return predictor.predict(years_to_predict, city_name)
+
+        # The store keeps forecasts; the pool only merges concurrent misses
+        training_hash = self.training_hash(city_name)
+        return get_resource(
+            ('forecast', self.MODEL_KEY, training_hash, years_to_predict, city_name),
+            lambda: self.store.get_or_compute(
+                compute,
+                ClimatePredictor.get_forecast_years(years_to_predict).year,
+                self.MODEL_KEY,
+                training_hash,
+                city_name
+            ),
+            keep=False
+        )
+
+    def feature_importance(self, city_name):
+        # Feature importance needs a trained model, even on a store hit
+        predictor = self.get_model(city_name)
+        return predictor.get_feature_importance(city_name) if predictor is not None else None
+
+    def forecast_stations(self, station_forecasts):
+        """Stations that have a forecast, in the order of station_forecasts"""
+        available = [city for city, pred in station_forecasts.items() if pred is not None]
+        return StationRegistry(self.stations.table.loc[available])
+
+    def cube_scenario(self, station_forecasts, years_to_predict):
+        """
+        Name of the gridded forecasts in the cube store: the model, the
+        training data, the forecast horizon (runs of different lengths give
+        different values for the same year) and everything the interpolation
+        depends on (stations, elevation source and IDW parameters)
+        """
+        interpolation_key = self.map_viz.interpolation_cache_key(self.forecast_stations(station_forecasts))
+        return f"{self.MODEL_KEY}@{self.data_hash[:16]}@{years_to_predict}y@{interpolation_key[:16]}"
+
+    def grid_forecasts(self, station_forecasts, elevation_data, years_to_predict):
+        """Temperature cube interpolated from the station forecasts, or None if there are none"""
+        if all(pred is None for pred in station_forecasts.values()):
+            return None
+
+        def interpolate():
+            return self.map_viz.interpolate_stations(
+                self.forecast_stations(station_forecasts),
+                np.column_stack([pred['temperature'].to_numpy()
+                                 for pred in station_forecasts.values() if pred is not None]),
+                elevation_data
+            )
+
+        return get_resource(
+            ('temperature_cube', self.cube_scenario(station_forecasts, years_to_predict)),
+            interpolate
+        )
+
+    def region_stats(self, station_forecasts, temperature_cube, years_to_predict):
+        if temperature_cube is None:
+            return None
+        return get_resource(
+            ('region_stats', self.cube_scenario(station_forecasts, years_to_predict)),
+            lambda: self.map_viz.zonal_statistics(temperature_cube, percentiles=())
+        )
+
+    def get(self, *names):
+        """Compute the named artifacts, declaring their nodes on first use"""
+        for name in names:
+            self._declare(name)
+        return self.graph.get(*names)
+
+    def _declare(self, name):
+        if name in self.graph:
             return
-    
-    # Train city-specific models
-    with st.spinner('Training city-specific models...'):
-        for city_name in CITY_DATA.keys():
-            city_data = generate_city_temperatures(climate_data, city_name)
-            predictor.train(city_data, city_name)
-    
+        graph = self.graph
+        kind, _, arg = name.partition(':')
+        if kind == 'forecast':
+            years, _, city = arg.partition(':')
+            graph.add(name, lambda: self.get_forecast(int(years), city or None))
+        elif kind == 'city_model':
+            # May run alongside the city's forecasts; get_model() trains once
+            graph.add(name, lambda: self.feature_importance(arg))
+        elif kind == 'station_forecasts':
+            inputs = [f'forecast:{arg}:{city}' for city in self.stations.names]
+            for dependency in inputs:
+                self._declare(dependency)
+            graph.add(name, lambda *preds: dict(zip(self.stations.names, preds)), inputs=inputs)
+        elif kind == 'temperature_cube':
+            # Only the latest cube is kept by the session; the pool bounds the rest
+            if self._cube_years not in (None, arg):
+                graph.discard(f'temperature_cube:{self._cube_years}', f'region_stats:{self._cube_years}')
+            self._cube_years = arg
+            self._declare(f'station_forecasts:{arg}')
+            graph.add(name, lambda forecasts, elevation_data: self.grid_forecasts(forecasts, elevation_data, int(arg)),
+                      inputs=[f'station_forecasts:{arg}', 'elevation'])
+        elif kind == 'region_stats':
+            self._declare(f'temperature_cube:{arg}')
+            graph.add(name, lambda forecasts, cube: self.region_stats(forecasts, cube, int(arg)),
+                      inputs=[f'station_forecasts:{arg}', f'temperature_cube:{arg}'])
+        else:
+            raise KeyError(f"Unknown artifact: {name}")
+
+def get_prediction_state(climate_data):
+    """This session's PredictionState, rebuilt when the climate data changes"""
+    data_hash = hash_dataframe(climate_data)
+    state = st.session_state.get('prediction_state')
+    if state is None or state.data_hash != data_hash:
+        state = PredictionState(climate_data, data_hash)
+        st.session_state['prediction_state'] = state
+    return state
+
+def show_prediction(climate_data, features):
+    st.subheader("Nepal City Climate Predictions")
+
+    with st.spinner('Preparing models...'):
+        state = get_prediction_state(climate_data)
+    show_forecasts(state)
+
+@st.fragment
+def show_forecasts(state):
+    """
+    Forecast controls and everything that depends on them; as a fragment,
+    a change to these widgets reruns only this function, not the data load
+    """
+    stations = state.stations
+    full_resolution = st.session_state.get('full_resolution_charts', False)
+
     # Interactive prediction controls
     col1, col2 = st.columns(2)
     with col1:
         years_to_predict = st.slider("Select years to forecast", 1, 10, 5)
     with col2:
-        selected_city = st.selectbox("Select city", list(CITY_DATA.keys()))
-    
+        selected_city = st.selectbox("Select city", stations.names)
+
     st.info(f"Forecasting {years_to_predict} years into the future for {selected_city}...")
-    
-    # Make predictions
-    base_predictions = predictor.predict(years_to_predict)
-    city_predictions = predictor.predict(years_to_predict, selected_city)
-    
-    if base_predictions is not None and city_predictions is not None:
-        # Create tabs for different visualizations
-        tab1, tab2, tab3, tab4 = st.tabs(["City Forecast", "Map View", "Model Analysis", "Comparison"])
-        
-        with tab1:
-            # City-specific forecast plot
-            fig_forecast = go.Figure()
-            
-            # Add historical data
-            city_historical = generate_city_temperatures(climate_data, selected_city)
-            fig_forecast.add_trace(go.Scatter(
-                x=city_historical['year'],
-                y=city_historical['temperature'],
-                name=f"Historical {selected_city}",
-                line=dict(color='blue')
-            ))
-            
-            # Add predictions
-            fig_forecast.add_trace(go.Scatter(
-                x=city_predictions['year'],
-                y=city_predictions['temperature'],
-                name=f"Ensemble Prediction",
-                line=dict(color='red', dash='dash')
-            ))
-            
-            # Add individual model predictions
-            fig_forecast.add_trace(go.Scatter(
-                x=city_predictions['year'],
-                y=city_predictions['sarima_pred'],
-                name="SARIMA Prediction",
-                line=dict(color='green', dash='dot')
-            ))
-            
-            fig_forecast.add_trace(go.Scatter(
-                x=city_predictions['year'],
-                y=city_predictions['rf_pred'],
-                name="Random Forest Prediction",
-                line=dict(color='purple', dash='dot')
-            ))
-            
-            # Update layout
-            fig_forecast.update_layout(
-                title=f"Temperature Forecast for {selected_city}",
-                xaxis_title="Year",
-                yaxis_title="Temperature (°C)",
-                hovermode='x unified'
-            )
-            
-            st.plotly_chart(fig_forecast)
-        
-        with tab2:
-            # Generate elevation and temperature rasters
-            elevation_data = map_viz.elevation_data
-            if elevation_data is None:
-                st.error("Could not load elevation data. Please try again.")
-                return
-            
-            temperature_data = map_viz.generate_temperature_raster(
-                city_predictions['temperature'].iloc[0],
-                elevation_data
-            )
-            
-            # Prepare city data for map
-            cities_data = {}
-            for city in CITY_DATA.keys():
-                city_pred = predictor.predict(years_to_predict, city)
-                if city_pred is not None:
-                    cities_data[city] = {
-                        **CITY_DATA[city],
-                        'temperature': city_pred['temperature'].iloc[0]
-                    }
-            
-            # Create and display the map
-            m = map_viz.create_interactive_map(
-                cities_data,
-                elevation_data=elevation_data,
-                temperature_data=temperature_data,
-                year=city_predictions['year'].iloc[0]
-            )
-            # Display the map using folium's HTML representation
-            st.components.v1.html(m._repr_html_(), height=600)
-        
-        with tab3:
-            # Model analysis
-            st.subheader("Model Analysis")
-            
-            # Feature importance
-            feature_importance = predictor.get_feature_importance(selected_city)
-            if feature_importance:
-                fig_importance = px.bar(
-                    x=list(feature_importance.keys()),
-                    y=list(feature_importance.values()),
-                    title=f"Feature Importance for {selected_city}",
-                    labels={'x': 'Feature', 'y': 'Importance'}
-                )
-                st.plotly_chart(fig_importance)
-            
-            # Model comparison
-            st.subheader("Model Comparison")
-            model_metrics = pd.DataFrame({
-                'Model': ['SARIMA', 'Random Forest', 'Ensemble'],
-                'Weight': [0.6, 0.4, 1.0],
-                'Description': [
-                    'Time series model for seasonal patterns',
-                    'Machine learning model for non-linear patterns',
-                    'Weighted combination of both models'
-                ]
-            })
-            st.table(model_metrics)
-        
-        with tab4:
-            # Compare predictions across cities
-            all_city_predictions = []
-            for city in CITY_DATA.keys():
-                city_pred = predictor.predict(years_to_predict, city)
-                if city_pred is not None:
-                    all_city_predictions.append(city_pred)
-            
-            if all_city_predictions:
-                combined_predictions = pd.concat(all_city_predictions)
-                
-                fig_comparison = px.line(
-                    combined_predictions,
-                    x='year',
-                    y='temperature',
-                    color='city',
-                    title="Temperature Predictions Across Cities",
-                    labels={'year': 'Year', 'temperature': 'Temperature (°C)'}
-                )
-                
-                st.plotly_chart(fig_comparison)
-        
-        # Display prediction metrics
-        st.subheader("Prediction Metrics")
-        
-        # Calculate city-specific metrics
-        last_historical = city_historical['temperature'].iloc[-1]
-        first_prediction = city_predictions['temperature'].iloc[0]
-        temp_change = first_prediction - last_historical
-        
-        # Calculate prediction confidence based on model agreement
-        sarima_pred = city_predictions['sarima_pred'].iloc[0]
-        rf_pred = city_predictions['rf_pred'].iloc[0]
-        model_diff = abs(sarima_pred - rf_pred)
-        confidence = 100 - (model_diff * 10)  # Higher difference means lower confidence
-        
-        # Calculate elevation-based metrics
-        elevation = CITY_DATA[selected_city]['elevation']
-        elevation_factor = 1 - (elevation / 8848)  # Normalize by Everest height
-        elevation_impact = f"{elevation_factor * 100:.1f}%"
-        
-        # Create metrics in columns
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric(
-                label=f"Temperature Change",
-                value=f"{temp_change:.2f}°C",
-                delta=f"{temp_change:.2f}°C",
-                delta_color="inverse"
-            )
-        
-        with col2:
-            st.metric(
-                label="Model Confidence",
-                value=f"{confidence:.1f}%",
-                delta=f"{model_diff:.2f}°C model difference",
-                delta_color="inverse"
-            )
-        
-        with col3:
-            st.metric(
-                label="Elevation Impact",
-                value=elevation_impact,
-                delta=f"{elevation}m above sea level"
-            )
-            
-        with col4:
-            st.metric(
-                label="Prediction Range",
-                value=f"{min(sarima_pred, rf_pred):.1f}°C - {max(sarima_pred, rf_pred):.1f}°C",
-                delta="Model range"
-            )
-        
-        # Add advanced metrics visualization
-        st.subheader("Advanced Metrics")
-        
-        # Create tabs for different metric visualizations
-        metric_tab1, metric_tab2, metric_tab3 = st.tabs(["Model Comparison", "Elevation Analysis", "Trend Analysis"])
-        
-        with metric_tab1:
-            # Model comparison metrics
-            model_metrics = pd.DataFrame({
-                'Model': ['SARIMA', 'Random Forest'],
-                'Prediction': [sarima_pred, rf_pred],
-                'Confidence': [confidence * 0.6, confidence * 0.4]
-            })
-            
-            fig_models = px.bar(
-                model_metrics,
-                x='Model',
-                y='Prediction',
-                color='Confidence',
-                title=f"Model Predictions for {selected_city}",
-                color_continuous_scale='RdYlGn'
-            )
-            st.plotly_chart(fig_models)
-            
-        with metric_tab2:
-            # Elevation impact analysis
-            elevation_data = pd.DataFrame({
-                'City': list(CITY_DATA.keys()),
-                'Elevation': [data['elevation'] for data in CITY_DATA.values()],
-                'Temperature': [predictor.predict(1, city)['temperature'].iloc[0] 
-                              for city in CITY_DATA.keys()]
-            })
-            
-            fig_elevation = px.scatter(
-                elevation_data,
-                x='Elevation',
-                y='Temperature',
-                hover_name='City',
-                title="Temperature vs Elevation",
-                trendline="ols"
+
+    # Models are trained only for forecasts not yet stored, at most once per session
+    base_key = f'forecast:{years_to_predict}:'
+    city_key = f'forecast:{years_to_predict}:{selected_city}'
+    with st.spinner('Loading forecasts...'), profile_stage('prediction.forecasts', city=selected_city):
+        artifacts = state.get(base_key, city_key)
+    base_predictions = artifacts[base_key]
+    city_predictions = artifacts[city_key]
+    if base_predictions is None:
+        st.error('Error training the base model. Please try again.')
+        return
+    if city_predictions is None:
+        st.error("Error generating predictions. Please try again.")
+        return
+
+    city_historical = state.city_history[selected_city]
+
+    # Only the selected view is computed
+    view = st.radio("View", VIEWS, horizontal=True, key='prediction_view', label_visibility='collapsed')
+
+    if view == "City Forecast":
+        # City-specific forecast plot
+        fig_forecast = go.Figure()
+
+        # Add historical data
+        fig_forecast.add_trace(go.Scatter(
+            x=city_historical['year'],
+            y=city_historical['temperature'],
+            name=f"Historical {selected_city}",
+            line=dict(color='blue')
+        ))
+
+        # Add predictions
+        fig_forecast.add_trace(go.Scatter(
+            x=city_predictions['year'],
+            y=city_predictions['temperature'],
+            name=f"Ensemble Prediction",
+            line=dict(color='red', dash='dash')
+        ))
+
+        # Add individual model predictions
+        fig_forecast.add_trace(go.Scatter(
+            x=city_predictions['year'],
+            y=city_predictions['sarima_pred'],
+            name="SARIMA Prediction",
+            line=dict(color='green', dash='dot')
+        ))
+
+        fig_forecast.add_trace(go.Scatter(
+            x=city_predictions['year'],
+            y=city_predictions['rf_pred'],
+            name="Random Forest Prediction",
+            line=dict(color='purple', dash='dot')
+        ))
+
+        # Update layout
+        fig_forecast.update_layout(
+            title=f"Temperature Forecast for {selected_city}",
+            xaxis_title="Year",
+            yaxis_title="Temperature (°C)",
+            hovermode='x unified'
+        )
+
+        st.plotly_chart(downsample_figure(fig_forecast, enabled=not full_resolution))
+
+    elif view == "Map View":
+        show_map_view(state, years_to_predict, selected_city, city_predictions)
+
+    elif view == "Model Analysis":
+        # Model analysis
+        st.subheader("Model Analysis")
+
+        # Feature importance
+        with st.spinner('Training city model...'):
+            feature_importance = state.get(f'city_model:{selected_city}')[f'city_model:{selected_city}']
+        if feature_importance:
+            fig_importance = px.bar(
+                x=list(feature_importance.keys()),
+                y=list(feature_importance.values()),
+                title=f"Feature Importance for {selected_city}",
+                labels={'x': 'Feature', 'y': 'Importance'}
             )
-            st.plotly_chart(fig_elevation)
-            
-        with metric_tab3:
-            # Trend analysis
-            historical_trend = city_historical['temperature'].rolling(window=3).mean()
-            future_trend = city_predictions['temperature'].rolling(window=2).mean()
-            
-            fig_trend = go.Figure()
-            fig_trend.add_trace(go.Scatter(
-                x=city_historical['year'],
-                y=historical_trend,
-                name='Historical Trend',
-                line=dict(color='blue')
-            ))
-            fig_trend.add_trace(go.Scatter(
-                x=city_predictions['year'],
-                y=future_trend,
-                name='Predicted Trend',
-                line=dict(color='red', dash='dash')
-            ))
-            
-            fig_trend.update_layout(
-                title=f"Temperature Trend Analysis for {selected_city}",
-                xaxis_title="Year",
-                yaxis_title="Temperature (°C)",
-                hovermode='x unified'
+            st.plotly_chart(fig_importance)
+
+        # Model comparison
+        st.subheader("Model Comparison")
+        model_metrics = pd.DataFrame({
+            'Model': ['SARIMA', 'Random Forest', 'Ensemble'],
+            'Weight': [0.6, 0.4, 1.0],
+            'Description': [
+                'Time series model for seasonal patterns',
+                'Machine learning model for non-linear patterns',
+                'Weighted combination of both models'
+            ]
+        })
+        st.table(model_metrics)
+
+    elif view == "Comparison":
+        # Compare predictions across cities
+        forecasts_key = f'station_forecasts:{years_to_predict}'
+        with st.spinner('Loading forecasts for every city...'):
+            station_forecasts = state.get(forecasts_key)[forecasts_key]
+        all_city_predictions = [
+            city_pred for city_pred in station_forecasts.values()
+            if city_pred is not None
+        ]
+
+        if all_city_predictions:
+            combined_predictions = pd.concat(all_city_predictions)
+
+            fig_comparison = px.line(
+                combined_predictions,
+                x='year',
+                y='temperature',
+                color='city',
+                title="Temperature Predictions Across Cities",
+                labels={'year': 'Year', 'temperature': 'Temperature (°C)'}
             )
-            st.plotly_chart(fig_trend)
+
+            st.plotly_chart(downsample_figure(fig_comparison, enabled=not full_resolution))
+
+    # Display prediction metrics
+    st.subheader("Prediction Metrics")
+
+    # Calculate city-specific metrics
+    last_historical = city_historical['temperature'].iloc[-1]
+    first_prediction = city_predictions['temperature'].iloc[0]
+    temp_change = first_prediction - last_historical
+
+    # Calculate prediction confidence based on model agreement
+    sarima_pred = city_predictions['sarima_pred'].iloc[0]
+    rf_pred = city_predictions['rf_pred'].iloc[0]
+    model_diff = abs(sarima_pred - rf_pred)
+    confidence = 100 - (model_diff * 10)  # Higher difference means lower confidence
+
+    # Calculate elevation-based metrics
+    elevation = stations.get(selected_city)['elevation']
+    elevation_factor = 1 - (elevation / 8848)  # Normalize by Everest height
+    elevation_impact = f"{elevation_factor * 100:.1f}%"
+
+    # Create metrics in columns
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric(
+            label=f"Temperature Change",
+            value=f"{temp_change:.2f}°C",
+            delta=f"{temp_change:.2f}°C",
+            delta_color="inverse"
+        )
+
+    with col2:
+        st.metric(
+            label="Model Confidence",
+            value=f"{confidence:.1f}%",
+            delta=f"{model_diff:.2f}°C model difference",
+            delta_color="inverse"
+        )
+
+    with col3:
+        st.metric(
+            label="Elevation Impact",
+            value=elevation_impact,
+            delta=f"{elevation}m above sea level"
+        )
+
+    with col4:
+        st.metric(
+            label="Prediction Range",
+            value=f"{min(sarima_pred, rf_pred):.1f}°C - {max(sarima_pred, rf_pred):.1f}°C",
+            delta="Model range"
+        )
+
+    # Add advanced metrics visualization
+    st.subheader("Advanced Metrics")
+
+    metric_view = st.radio("Metrics", METRIC_VIEWS, horizontal=True, key='prediction_metric_view',
+                           label_visibility='collapsed')
+
+    if metric_view == "Model Comparison":
+        # Model comparison metrics
+        model_metrics = pd.DataFrame({
+            'Model': ['SARIMA', 'Random Forest'],
+            'Prediction': [sarima_pred, rf_pred],
+            'Confidence': [confidence * 0.6, confidence * 0.4]
+        })
+
+        fig_models = px.bar(
+            model_metrics,
+            x='Model',
+            y='Prediction',
+            color='Confidence',
+            title=f"Model Predictions for {selected_city}",
+            color_continuous_scale='RdYlGn'
+        )
+        st.plotly_chart(fig_models)
+
+    elif metric_view == "Elevation Analysis":
+        # Elevation impact analysis on next year's forecast of every city
+        with st.spinner('Loading forecasts for every city...'):
+            next_year = state.get('station_forecasts:1')['station_forecasts:1']
+        forecast_cities = [city for city in stations.names if next_year[city] is not None]
+        elevation_data = pd.DataFrame({
+            'City': forecast_cities,
+            'Elevation': stations.table.loc[forecast_cities, 'elevation'].tolist(),
+            'Temperature': [next_year[city]['temperature'].iloc[0]
+                          for city in forecast_cities]
+        })
+
+        fig_elevation = go.Figure(binned_scatter_traces(
+            elevation_data['Elevation'],
+            elevation_data['Temperature'],
+            hover_text=elevation_data['City']
+        ))
+        fig_elevation.update_layout(
+            title="Temperature vs Elevation",
+            xaxis_title='Elevation',
+            yaxis_title='Temperature'
+        )
+        st.plotly_chart(fig_elevation)
+
+    elif metric_view == "Trend Analysis":
+        # Trend analysis
+        historical_trend = city_historical['temperature'].rolling(window=3).mean()
+        future_trend = city_predictions['temperature'].rolling(window=2).mean()
+
+        fig_trend = go.Figure()
+        fig_trend.add_trace(go.Scatter(
+            x=city_historical['year'],
+            y=historical_trend,
+            name='Historical Trend',
+            line=dict(color='blue')
+        ))
+        fig_trend.add_trace(go.Scatter(
+            x=city_predictions['year'],
+            y=future_trend,
+            name='Predicted Trend',
+            line=dict(color='red', dash='dash')
+        ))
+
+        fig_trend.update_layout(
+            title=f"Temperature Trend Analysis for {selected_city}",
+            xaxis_title="Year",
+            yaxis_title="Temperature (°C)",
+            hovermode='x unified'
+        )
+        st.plotly_chart(downsample_figure(fig_trend, enabled=not full_resolution))
+
+def show_map_view(state, years_to_predict, selected_city, city_predictions):
+    """Interpolated forecast map, regional summary and archived point forecasts"""
+    map_viz = state.map_viz
+    stations = state.stations
+    forecasts_key = f'station_forecasts:{years_to_predict}'
+    cube_key = f'temperature_cube:{years_to_predict}'
+    stats_key = f'region_stats:{years_to_predict}'
+
+    # Forecasts for every station, gridded for all years at once
+    with st.spinner('Interpolating station forecasts...'):
+        elevation_data = state.get('elevation')['elevation']
+        if elevation_data is None:
+            st.error("Could not load elevation data. Please try again.")
+            return
+        artifacts = state.get(forecasts_key, cube_key, stats_key)
+    temperature_cube = artifacts[cube_key]
+    if temperature_cube is None:
+        st.error("Could not load station forecasts. Please try again.")
+        return
+    cities_data = {
+        city: {**stations.get(city), 'temperature': pred['temperature'].iloc[0]}
+        for city, pred in artifacts[forecasts_key].items()
+        if pred is not None
+    }
+
+    # Tiles and contours keep the page small; embedded images work offline.
+    # Tiles are only offered to browsers that can reach the tile server
+    layer_modes = {
+        "Embedded images": "image",
+        "Map tiles": "tiles",
+        "Contours (low bandwidth)": "contours"
+    }
+    if not tiles_reachable(st.context.headers.get('Host')):
+        del layer_modes["Map tiles"]
+    layer_mode = st.radio(
+        "Raster layers",
+        list(layer_modes.keys()),
+        horizontal=True,
+        help="Tiles are served from the tile server (set CLIMATE_APP_TILE_URL "
+             "to offer them to remote browsers); contours replace the rasters "
+             "with compact vector polygons"
+    )
+
+    # Create and display the map (cached on the layers' content)
+    map_html = map_viz.render_interactive_map(
+        cities_data,
+        elevation_data=elevation_data,
+        temperature_data=temperature_cube[0],
+        year=city_predictions['year'].iloc[0],
+        layer_mode=layer_modes[layer_mode]
+    )
+    # Display the map using folium's HTML representation
+    st.components.v1.html(map_html, height=600)
+
+    # Regional summary for every forecast year
+    st.subheader("Regional Temperature Summary")
+    region_stats = artifacts[stats_key].copy()
+    region_stats['year'] = city_predictions['year'].to_numpy()[region_stats['layer']]
+    st.dataframe(
+        region_stats.pivot(index='zone', columns='year', values='mean').round(1),
+        use_container_width=True
+    )
+
+    # Archive the gridded forecasts once per process; years already stored
+    # are not rewritten. Sessions share one store so they see each other's writes
+    cube_store = get_resource(('cube_store', 'forecasts'), map_viz.open_cube_store)
+    scenario = state.cube_scenario(artifacts[forecasts_key], years_to_predict)
+    forecast_years = city_predictions['year'].to_numpy(dtype=int)
+
+    def archive():
+        new_years = ~np.isin(forecast_years, cube_store.years(scenario))
+        if new_years.any():
+            cube_store.write(scenario, forecast_years[new_years], temperature_cube[new_years])
+        return True
+
+    get_resource(('cube_archive', scenario, tuple(forecast_years)), archive)
+
+    show_point_forecast(state, cube_store, scenario, selected_city)
+
+@st.fragment
+def show_point_forecast(state, cube_store, scenario, selected_city):
+    """Archived forecast at a chosen point; reruns alone when the point changes"""
+    # Point lookups read a single chunk per archived year
+    st.subheader("Point Forecast")
+    bounds = state.map_viz.nepal_bounds
+    selected_station = state.stations.get(selected_city)
+    col1, col2 = st.columns(2)
+    with col1:
+        query_lat = st.number_input(
+            "Latitude",
+            min_value=bounds['south'],
+            max_value=bounds['north'],
+            value=float(selected_station['lat']),
+            format="%.4f"
+        )
+    with col2:
+        query_lon = st.number_input(
+            "Longitude",
+            min_value=bounds['west'],
+            max_value=bounds['east'],
+            value=float(selected_station['lon']),
+            format="%.4f"
+        )
+    point_forecast = cube_store.read_point(scenario, query_lat, query_lon)
+    if point_forecast.notna().any():
+        st.line_chart(point_forecast.rename('Temperature (°C)'))
     else:
-        st.error("Error generating predictions. Please try again.")
+        st.info("The selected point is outside Nepal.")
 
 if __name__ == "__main__":
     show_prediction()
-    
\ No newline at end of file
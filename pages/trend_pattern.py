@@ -11,6 +11,10 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
+from figure_cache import cached_plotly
+from chart_aggregates import box_traces
+from downsampling import downsample_figure
+
 def show_trend_pattern(climate_data, features):
     """
     Display climate trends and patterns visualization.
@@ -20,45 +24,54 @@ def show_trend_pattern(climate_data, features):
         features (pd.DataFrame): Processed features containing month and other derived features
     """
     st.subheader("Climate Trends and Patterns")
+    full_resolution = st.session_state.get('full_resolution_charts', False)
     
     # Display climate time series plots
     col1, col2 = st.columns(2)
     
     with col1:
         # Temperature trend
-        fig_temp = px.line(climate_data, x='year', y='temperature',
-                          title='Temperature Trend Over Time')
-        fig_temp.update_layout(yaxis_title='Temperature (°C)')
-        st.plotly_chart(fig_temp)
+        def build_temperature_trend():
+            fig_temp = px.line(climate_data, x='year', y='temperature',
+                              title='Temperature Trend Over Time')
+            fig_temp.update_layout(yaxis_title='Temperature (°C)')
+            return downsample_figure(fig_temp, enabled=not full_resolution)
+        st.plotly_chart(cached_plotly('trend_temperature', climate_data, build_temperature_trend,
+                                      full_resolution=full_resolution))
         
     with col2:
         # Precipitation trend 
-        fig_precip = px.line(climate_data, x='year', y='precipitation',
-                            title='Precipitation Trend Over Time')
-        fig_precip.update_layout(yaxis_title='Precipitation (mm)')
-        st.plotly_chart(fig_precip)
+        def build_precipitation_trend():
+            fig_precip = px.line(climate_data, x='year', y='precipitation',
+                                title='Precipitation Trend Over Time')
+            fig_precip.update_layout(yaxis_title='Precipitation (mm)')
+            return downsample_figure(fig_precip, enabled=not full_resolution)
+        st.plotly_chart(cached_plotly('trend_precipitation', climate_data, build_precipitation_trend,
+                                      full_resolution=full_resolution))
 
     # Display seasonal patterns
     st.subheader("Seasonal Patterns")
     
     try:
-        # Calculate monthly averages
-        monthly_temp = features.groupby('month')['temperature'].mean()
-        monthly_precip = features.groupby('month')['precipitation'].mean()
-        
-        # Combined seasonal plot
-        fig_seasonal = go.Figure()
-        fig_seasonal.add_trace(go.Scatter(x=monthly_temp.index, y=monthly_temp,
-                                        name="Temperature", yaxis="y1"))
-        fig_seasonal.add_trace(go.Bar(x=monthly_precip.index, y=monthly_precip,
-                                    name="Precipitation", yaxis="y2"))
-        
-        fig_seasonal.update_layout(
-            title="Monthly Temperature and Precipitation Patterns",
-            yaxis=dict(title="Temperature (°C)"),
-            yaxis2=dict(title="Precipitation (mm)", overlaying="y", side="right")
-        )
-        st.plotly_chart(fig_seasonal)
+        def build_seasonal():
+            # Calculate monthly averages
+            monthly_temp = features.groupby('month')['temperature'].mean()
+            monthly_precip = features.groupby('month')['precipitation'].mean()
+            
+            # Combined seasonal plot
+            fig_seasonal = go.Figure()
+            fig_seasonal.add_trace(go.Scatter(x=monthly_temp.index, y=monthly_temp,
+                                            name="Temperature", yaxis="y1"))
+            fig_seasonal.add_trace(go.Bar(x=monthly_precip.index, y=monthly_precip,
+                                        name="Precipitation", yaxis="y2"))
+            
+            fig_seasonal.update_layout(
+                title="Monthly Temperature and Precipitation Patterns",
+                yaxis=dict(title="Temperature (°C)"),
+                yaxis2=dict(title="Precipitation (mm)", overlaying="y", side="right")
+            )
+            return fig_seasonal
+        st.plotly_chart(cached_plotly('seasonal_patterns', features[['month', 'temperature', 'precipitation']], build_seasonal))
         
     except Exception as e:
         st.error(f"Error displaying seasonal patterns: {e}")
@@ -72,11 +85,21 @@ def show_trend_pattern(climate_data, features):
     col3, col4 = st.columns(2)
     
     with col3:
-        fig_temp_box = px.box(features, x='season', y='temperature',
-                            title="Temperature Distribution by Season")
+        fig_temp_box = cached_plotly(
+            'season_temperature_box', features[['season', 'temperature']],
+            lambda: go.Figure(
+                box_traces(features, 'season', 'temperature'),
+                layout=dict(title="Temperature Distribution by Season", xaxis_title='season', yaxis_title='temperature')
+            )
+        )
         st.plotly_chart(fig_temp_box)
         
     with col4:
-        fig_precip_box = px.box(features, x='season', y='precipitation',
-                               title="Precipitation Distribution by Season") 
+        fig_precip_box = cached_plotly(
+            'season_precipitation_box', features[['season', 'precipitation']],
+            lambda: go.Figure(
+                box_traces(features, 'season', 'precipitation'),
+                layout=dict(title="Precipitation Distribution by Season", xaxis_title='season', yaxis_title='precipitation')
+            )
+        )
         st.plotly_chart(fig_precip_box)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import os
+import io
+import time
+import threading
+import functools
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+# Set CLIMATE_APP_PROFILE=0 to turn stage recording off entirely
+PROFILING_ENABLED = os.environ.get('CLIMATE_APP_PROFILE', '1') != '0'
+
+# Most recent stage records kept in memory
+HISTORY_SIZE = int(os.environ.get('CLIMATE_APP_PROFILE_HISTORY', 1000))
+
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+
+# Open stages of each thread, used to carry memory peaks up to enclosing stages
+_local = threading.local()
+
+# Threads with traced stages open; tracemalloc has one peak for the whole
+# process, so it is only reset and read while a single thread is inside stages
+_traced_stacks = {}
+_traced_lock = threading.Lock()
+
+def set_memory_tracking(enabled):
+    """
+    Start or stop tracemalloc for peak-memory figures
+
+    Tracing slows allocation-heavy code noticeably, so it is off unless
+    requested (or CLIMATE_APP_PROFILE_MEMORY=1). The traced peak is
+    process-wide, so stages that overlap stages on other threads record no
+    peak (NaN); allocations by threads outside any stage still count.
+    """
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def is_memory_tracking():
+    """Whether stage records include peak memory"""
+    return tracemalloc.is_tracing()
+
+if os.environ.get('CLIMATE_APP_PROFILE_MEMORY') == '1':
+    set_memory_tracking(True)
+
+@contextmanager
+def profile_stage(name, **tags):
+    """
+    Record wall time, CPU time of the calling thread and (when tracing)
+    peak traced memory of a named stage
+
+    Args:
+        name (str): Stage name, e.g. 'model.sarimax_fit'
+        **tags: Extra columns stored with the record, e.g. city='Pokhara'
+    """
+    if not PROFILING_ENABLED:
+        yield
+        return
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    tracing = tracemalloc.is_tracing()
+    frame = {'start_memory': 0, 'peak': 0, 'shared': False}
+    if tracing:
+        with _traced_lock:
+            others = [other for thread_id, other in _traced_stacks.items()
+                      if thread_id != threading.get_ident()]
+            if others:
+                # Resetting would wipe their peaks and their allocations count
+                # towards ours, so no open stage on either side gets a peak
+                for open_frame in [f for other in others for f in other] + stack + [frame]:
+                    open_frame['shared'] = True
+            else:
+                current, peak = tracemalloc.get_traced_memory()
+                # Resetting the peak below would lose the enclosing stage's peak so far
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+                tracemalloc.reset_peak()
+                frame['start_memory'] = frame['peak'] = current
+            stack.append(frame)
+            _traced_stacks[threading.get_ident()] = stack
+    else:
+        stack.append(frame)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        peak_kb = float('nan')
+        if tracing:
+            with _traced_lock:
+                stack.pop()
+                if not stack:
+                    _traced_stacks.pop(threading.get_ident(), None)
+                if not frame['shared'] and tracemalloc.is_tracing():
+                    peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                    peak_kb = (peak - frame['start_memory']) / 1024
+                    if stack:
+                        stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        else:
+            stack.pop()
+
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'stage': name,
+            'wall_ms': wall * 1000,
+            'cpu_ms': cpu * 1000,
+            'peak_kb': peak_kb,
+            'depth': len(stack),
+            'thread': threading.current_thread().name,
+            'error': error,
+            **tags
+        }
+        with _history_lock:
+            _history.append(record)
+
+def profiled(name=None):
+    """Decorator recording every call of a function as a profile_stage"""
+    def decorator(func):
+        stage = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def get_history():
+    """Recorded stages, oldest first, as a DataFrame"""
+    with _history_lock:
+        records = list(_history)
+    return pd.DataFrame.from_records(records)
+
+def clear_history():
+    """Drop all recorded stages"""
+    with _history_lock:
+        _history.clear()
+
+def summarize(history=None):
+    """
+    Per-stage call count and wall/CPU/memory statistics
+
+    Returns:
+        pd.DataFrame: One row per stage, slowest total wall time first
+    """
+    history = get_history() if history is None else history
+    if history.empty:
+        return pd.DataFrame()
+    summary = history.groupby('stage').agg(
+        calls=('wall_ms', 'size'),
+        total_wall_ms=('wall_ms', 'sum'),
+        mean_wall_ms=('wall_ms', 'mean'),
+        p95_wall_ms=('wall_ms', lambda values: values.quantile(0.95)),
+        max_wall_ms=('wall_ms', 'max'),
+        mean_cpu_ms=('cpu_ms', 'mean'),
+        max_peak_kb=('peak_kb', 'max'),
+        errors=('error', 'count')
+    )
+    return summary.sort_values('total_wall_ms', ascending=False)
+
+def export_json():
+    """Recorded stages as a JSON array"""
+    history = get_history()
+    return history.to_json(orient='records') if not history.empty else '[]'
+
+def export_csv():
+    """Recorded stages as CSV"""
+    buffer = io.StringIO()
+    get_history().to_csv(buffer, index=False)
+    return buffer.getvalue()
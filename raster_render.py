@@ -0,0 +1,67 @@
+import base64
+import numpy as np
+import branca.colormap as cm
+from folium.utilities import write_png
+from cache_utils import LRUCache, hash_array
+
+ELEVATION_COLORS = ['#a6cee3', '#1f78b4', '#b2df8a', '#33a02c', '#fb9a99', '#e31a1c']
+TEMPERATURE_COLORS = ['#313695', '#4575b4', '#74add1', '#abd9e9', '#e0f3f8',
+                      '#ffffbf', '#fee090', '#fdae61', '#f46d43', '#d73027']
+
+# Encoded overlays keyed on raster digest, colors and value range
+_png_cache = LRUCache(max_entries=32)
+
+def build_colormap(colors, data, caption):
+    """Create a branca colormap spanning the finite range of the data"""
+    return cm.LinearColormap(
+        colors=colors,
+        vmin=float(np.nanmin(data)),
+        vmax=float(np.nanmax(data)),
+        caption=caption
+    )
+
+def build_lut(colormap, size=256):
+    """Sample a colormap into a (size x 4) uint8 RGBA lookup table"""
+    values = np.linspace(colormap.vmin, colormap.vmax, size)
+    return np.array([colormap.rgba_bytes_tuple(value) for value in values], dtype=np.uint8)
+
+def colorize(data, lut, vmin, vmax, mask=None):
+    """
+    Map a raster to RGBA through a lookup table with vectorized indexing
+    
+    Non-finite cells, and cells outside the optional boolean mask, become
+    fully transparent; only the masked cells are looked up.
+    """
+    data = np.asarray(data, dtype=np.float32)
+    values = data[mask] if mask is not None else data
+    valid = np.isfinite(values)
+    
+    scale = (len(lut) - 1) / (vmax - vmin) if vmax > vmin else 0.0
+    index = np.where(valid, values, vmin) - vmin
+    index *= scale
+    index += 0.5
+    np.clip(index, 0, len(lut) - 1, out=index)
+    
+    colors = lut[index.astype(np.intp)]
+    colors[~valid] = 0
+    if mask is None:
+        return colors
+    
+    rgba = np.zeros(data.shape + (4,), dtype=np.uint8)
+    rgba[mask] = colors
+    return rgba
+
+def raster_to_data_url(data, colormap, mask=None):
+    """
+    Colorize a raster (row 0 = southernmost) and return it as a PNG data URL,
+    reusing the encoded image when the same raster was rendered before
+    """
+    key = (hash_array(data), None if mask is None else hash_array(mask),
+           tuple(colormap.colors), colormap.vmin, colormap.vmax)
+    url = _png_cache.get(key)
+    if url is None:
+        rgba = colorize(data, build_lut(colormap), colormap.vmin, colormap.vmax, mask)
+        png = write_png(rgba, origin='lower')  # put the northern rows on top
+        url = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+        _png_cache.put(key, url)
+    return url
@@ -0,0 +1,189 @@
+import os
+import sys
+import mmap
+import types
+import pickle
+import threading
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+from cache_utils import LRUCache
+from profiling import profile_stage
+
+# Memory budget of pooled values, measured with estimate_size()
+POOL_MAX_BYTES = int(os.environ.get('CLIMATE_APP_POOL_MB', 512)) * 1024 * 1024
+
+# Code and module objects are shared with the interpreter, not owned by a value
+_UNOWNED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+            types.MethodType, mmap.mmap)
+
+def _references(value):
+    """Objects reachable from value that estimate_size() and freeze_arrays() walk into"""
+    if isinstance(value, dict):
+        return list(value.keys()) + list(value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return list(value)
+    if isinstance(value, np.ndarray) or isinstance(value, (pd.DataFrame, pd.Series)):
+        return []
+    if hasattr(value, '__dict__') and not isinstance(value, _UNOWNED):
+        return [vars(value)]
+    return []
+
+def estimate_size(value):
+    """
+    Approximate bytes held by a value and everything it references
+
+    Counts array buffers (each once, memory-mapped ones as nothing since
+    their pages belong to the OS page cache), DataFrame memory, strings and
+    the contents of containers and object attributes. Objects opaque to
+    Python, such as fitted scikit-learn trees, are measured by pickling.
+    """
+    total, seen, stack = 0, set(), [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _UNOWNED) or item is None:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            if isinstance(item, np.memmap):
+                continue
+            if item.base is not None:
+                stack.append(item.base)
+            elif item.flags.owndata:
+                total += item.nbytes
+        elif isinstance(item, (pd.DataFrame, pd.Series)):
+            total += int(np.sum(item.memory_usage(deep=True)))
+        elif isinstance(item, (bytes, bytearray, str)):
+            total += len(item)
+        elif isinstance(item, (dict, list, tuple, set, frozenset)) or hasattr(item, '__dict__'):
+            total += sys.getsizeof(item)
+            stack.extend(_references(item))
+        else:
+            try:
+                total += len(pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL))
+            except Exception:
+                total += sys.getsizeof(item)
+    return total
+
+def freeze_arrays(value):
+    """
+    Clear the writeable flag of every array reachable from value through
+    containers and object attributes, so shared state cannot be modified
+    in place; returns value
+    """
+    seen, stack = set(), [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _UNOWNED):
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            if item.flags.writeable:
+                item.flags.writeable = False
+        else:
+            stack.extend(_references(item))
+    return value
+
+class ResourcePool:
+    """
+    Process-wide store of expensive artifacts shared by every session
+
+    The first caller of get() for a missing key runs its build function;
+    callers asking for the same key while that build runs wait for its
+    result instead of starting another. Pooled values are shared between
+    sessions and must be treated as read-only (arrays are returned with
+    their writeable flag cleared; use freeze_arrays() in build functions
+    for arrays held inside other objects). None results and exceptions are
+    not kept, so a failed build is retried by the next caller. The byte
+    budget is applied to estimate_size() of each value unless get() is
+    given a size.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        self._values = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'builds': 0, 'waits': 0, 'failures': 0}
+
+    def get(self, key, build, keep=True, size=None):
+        """
+        Return the pooled value of key, building it once on a miss
+
+        Args:
+            key (tuple): Resource kind followed by everything the value depends on,
+                         e.g. ('model', model_key, data_hash, 'Pokhara')
+            build (callable): Called with no arguments to produce the value
+            keep (bool): Keep the value after the build; with False concurrent
+                         requests are still coalesced but later ones build again
+                         (for results persisted elsewhere, e.g. the forecast store)
+            size (callable, optional): Returns the bytes held by the built value,
+                                       default estimate_size
+
+        Returns:
+            The value, or None if build() returned None
+        """
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._stats['hits'] += 1
+                return value
+            future = self._in_flight.get(key)
+            building = future is None
+            if building:
+                future = self._in_flight[key] = Future()
+                self._stats['builds'] += 1
+            else:
+                self._stats['waits'] += 1
+
+        if not building:
+            return future.result()
+
+        try:
+            with profile_stage(f'pool.{key[0]}'):
+                value = _read_only(build())
+            nbytes = (size or estimate_size)(value) if keep and value is not None else 0
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+                self._stats['failures'] += 1
+            future.set_exception(e)
+            raise
+
+        # Published before the key leaves _in_flight so no caller sees neither
+        with self._lock:
+            if keep and value is not None:
+                self._values.put(key, value, nbytes)
+            del self._in_flight[key]
+        future.set_result(value)
+        return value
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def stats(self):
+        """Hit, build, wait and failure counts plus current size"""
+        with self._lock:
+            return {**self._stats, 'entries': len(self._values), 'bytes': self._values.total_bytes}
+
+    def clear(self):
+        """Drop every pooled value; builds in flight still complete"""
+        self._values.clear()
+
+def _read_only(value):
+    if isinstance(value, np.ndarray) and value.flags.writeable:
+        value.flags.writeable = False
+    return value
+
+_pool = ResourcePool(max_bytes=POOL_MAX_BYTES)
+
+def get_resource(key, build, keep=True, size=None):
+    """Shared value of key from the process-wide pool; see ResourcePool.get"""
+    return _pool.get(key, build, keep, size)
+
+def resource_stats():
+    """Counters of the process-wide pool"""
+    return _pool.stats()
+
+def clear_resources():
+    """Drop every value held by the process-wide pool"""
+    _pool.clear()
@@ -0,0 +1,121 @@
+import os
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+class StationRegistry:
+    """Columnar table of stations with a spatial index for nearest-station lookups"""
+
+    REQUIRED_COLUMNS = ['lat', 'lon']
+
+    def __init__(self, stations):
+        missing = [col for col in self.REQUIRED_COLUMNS if col not in stations.columns]
+        if missing:
+            raise ValueError(f"Station table is missing columns: {missing}")
+        
+        self.table = stations.copy()
+        self.table.index.name = 'city'
+        if 'elevation' not in self.table.columns:
+            self.table['elevation'] = np.nan
+        self._tree = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a registry from a {name: {'lat': ..., 'lon': ..., ...}} mapping"""
+        return cls(pd.DataFrame.from_dict(data, orient='index'))
+
+    @classmethod
+    def from_file(cls, path):
+        """Build a registry from a CSV or Parquet file with a name/city column"""
+        if os.path.splitext(path)[1].lower() == '.parquet':
+            stations = pd.read_parquet(path)
+        else:
+            stations = pd.read_csv(path)
+        
+        name_col = 'city' if 'city' in stations.columns else 'name'
+        return cls(stations.set_index(name_col))
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, name):
+        return name in self.table.index
+
+    def __iter__(self):
+        return iter(self.table.index)
+
+    @property
+    def names(self):
+        """Station names in registry order"""
+        return self.table.index.tolist()
+
+    def get(self, name):
+        """Return a station's attributes as a dict"""
+        return self.table.loc[name].to_dict()
+
+    def to_dict(self):
+        """Return the registry as a {name: attributes} mapping"""
+        return self.table.to_dict(orient='index')
+
+    @property
+    def tree(self):
+        """Ball tree over station coordinates using the haversine metric, built on first use"""
+        if self._tree is None:
+            coords = np.radians(self.table[['lat', 'lon']].to_numpy(dtype=float))
+            self._tree = BallTree(coords, metric='haversine')
+        return self._tree
+
+    @staticmethod
+    def _query_points(lats, lons):
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        return np.radians(np.column_stack([lats, lons]))
+
+    def query_nearest(self, lats, lons, k=1):
+        """
+        Find the k nearest stations to each query point
+        
+        Returns:
+            tuple: (distances in km, station positions), both of shape (n_points, k)
+        """
+        k = min(k, len(self))
+        distances, indices = self.tree.query(self._query_points(lats, lons), k=k)
+        return distances * EARTH_RADIUS_KM, indices
+
+    def query_radius(self, lats, lons, radius_km):
+        """
+        Find all stations within radius_km of each query point
+        
+        Returns:
+            tuple: (distances in km, station positions), one sorted array per query point
+        """
+        indices, distances = self.tree.query_radius(
+            self._query_points(lats, lons),
+            r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True,
+            sort_results=True
+        )
+        return [d * EARTH_RADIUS_KM for d in distances], list(indices)
+
+    def fill_elevation(self, sample_elevation, overwrite=False):
+        """
+        Fill station elevations in bulk from a point sampler such as
+        NepalMapVisualizer.sample_elevation
+        
+        Args:
+            sample_elevation (callable): Maps (lats, lons) arrays to elevations
+            overwrite (bool): Replace known elevations too, not only missing ones
+        """
+        target = np.ones(len(self), dtype=bool) if overwrite else self.table['elevation'].isna().to_numpy()
+        if target.any():
+            sampled = sample_elevation(self.table['lat'].to_numpy(dtype=float)[target],
+                                       self.table['lon'].to_numpy(dtype=float)[target])
+            self.table.loc[target, 'elevation'] = sampled
+        return self
+
+    def nearest_names(self, lats, lons, k=1):
+        """Names of the k nearest stations to each query point"""
+        _, indices = self.query_nearest(lats, lons, k)
+        return self.table.index.to_numpy()[indices]
@@ -0,0 +1,111 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from profiling import profile_stage
+
+# Worker threads per graph; numpy, scikit-learn and SQLite release the GIL
+# for most of their work, so artifacts overlap well on threads
+MAX_WORKERS = int(os.environ.get('CLIMATE_APP_TASK_WORKERS', min(8, (os.cpu_count() or 1) + 2)))
+
+class TaskGraph:
+    """
+    Lazily evaluated graph of named artifacts
+
+    Each node is declared with the function that builds it and the names of
+    the nodes it takes as inputs. get() runs only the nodes the requested
+    artifacts depend on, each at most once per graph, and runs nodes whose
+    inputs are ready concurrently on a thread pool.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or MAX_WORKERS
+        self._nodes = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, func, inputs=()):
+        """
+        Declare an artifact
+
+        Args:
+            name (str): Artifact name
+            func (callable): Called with the input artifacts as positional arguments
+            inputs (iterable): Names of the artifacts func takes, in order
+        """
+        self._nodes[name] = (func, tuple(inputs))
+        return self
+
+    def __contains__(self, name):
+        return name in self._nodes
+
+    def discard(self, *names):
+        """Drop the nodes and computed values of the named artifacts, if present"""
+        with self._lock:
+            for name in names:
+                self._nodes.pop(name, None)
+                self._results.pop(name, None)
+
+    def _required(self, names):
+        """Nodes needed for names that have not been computed, in dependency order"""
+        order, visiting, seen = [], set(), set()
+
+        def visit(name):
+            if name in seen or name in self._results:
+                return
+            if name not in self._nodes:
+                raise KeyError(f"Unknown artifact: {name}")
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through {name}")
+            visiting.add(name)
+            for dependency in self._nodes[name][1]:
+                visit(dependency)
+            visiting.discard(name)
+            seen.add(name)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def _run(self, name):
+        func, inputs = self._nodes[name]
+        with profile_stage(f'task.{name}'):
+            return func(*[self._results[dependency] for dependency in inputs])
+
+    def get(self, *names):
+        """
+        Compute the named artifacts and everything they depend on
+
+        Returns:
+            dict: Artifact name -> value for each requested name; an exception
+                  raised by any required node is re-raised here
+        """
+        with self._lock:
+            pending = self._required(names)
+            if len(pending) == 1:
+                self._results[pending[0]] = self._run(pending[0])
+            elif pending:
+                self._run_parallel(pending)
+            return {name: self._results[name] for name in names}
+
+    def _run_parallel(self, pending):
+        waiting = {name: {dep for dep in self._nodes[name][1] if dep not in self._results}
+                   for name in pending}
+        running = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            try:
+                while waiting or running:
+                    for name in [name for name, deps in waiting.items() if not deps]:
+                        del waiting[name]
+                        running[pool.submit(self._run, name)] = name
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        self._results[name] = future.result()
+                        for deps in waiting.values():
+                            deps.discard(name)
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
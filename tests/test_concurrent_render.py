@@ -0,0 +1,82 @@
+"""
+Concurrent matplotlib renders must match serial ones and must not leak.
+
+Figures are built on their own Agg canvas (no pyplot state), so renders
+from many threads at once should produce byte-identical PNGs, and traced
+memory should not grow from one round of renders to the next.
+"""
+
+import gc
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from visualizations import (
+    plot_climate_timeseries, plot_seasonal_patterns, plot_yearly_trend,
+    plot_actual_vs_predicted, plot_prediction_history, figure_to_png
+)
+
+WORKERS = 8
+RENDERS_PER_ROUND = 10
+ROUNDS = 3
+# Allowed growth of traced memory between the first and last round
+MAX_GROWTH_BYTES = 4 * 1024 * 1024
+
+
+@pytest.fixture(scope='module')
+def jobs():
+    rng = np.random.default_rng(0)
+    years = np.repeat(np.arange(2010, 2020), 12)
+    months = np.tile(np.arange(1, 13), 10)
+    season = np.sin((months - 4) / 12 * 2 * np.pi)
+    data = pd.DataFrame({
+        'year': years,
+        'month': months,
+        'temperature': 20 + 6 * season + rng.normal(0, 1, len(years)),
+        'precipitation': np.clip(150 + 120 * season + rng.normal(0, 20, len(years)), 0, None)
+    })
+    actual = data[['temperature', 'precipitation']]
+    predicted = actual + 0.5
+    return {
+        'timeseries': lambda: plot_climate_timeseries(data),
+        'seasonal': lambda: plot_seasonal_patterns(data),
+        'yearly': lambda: plot_yearly_trend(data),
+        'actual_vs_predicted': lambda: plot_actual_vs_predicted(actual, predicted),
+        'prediction_history': lambda: plot_prediction_history(
+            actual['temperature'], predicted['temperature'],
+            actual['precipitation'], predicted['precipitation']
+        ),
+    }
+
+
+def render(job):
+    return figure_to_png(job(), dpi=50)
+
+
+def test_concurrent_renders_match_serial_and_memory_stays_flat(jobs):
+    names = list(jobs)
+    reference = {name: render(jobs[name]) for name in names}
+    assert all(reference.values())
+
+    traced = []
+    tracemalloc.start()
+    try:
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            for _ in range(ROUNDS):
+                batch = [names[i % len(names)] for i in range(RENDERS_PER_ROUND)]
+                images = list(pool.map(lambda name: render(jobs[name]), batch))
+
+                mismatches = [name for name, image in zip(batch, images) if image != reference[name]]
+                assert mismatches == []
+
+                del images
+                gc.collect()
+                traced.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+
+    # The first round warms font and glyph caches; later rounds must not grow
+    assert traced[-1] - traced[0] < MAX_GROWTH_BYTES, traced
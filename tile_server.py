@@ -0,0 +1,174 @@
+import os
+import math
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import numpy as np
+from folium.utilities import write_png
+from cache_utils import get_cache_dir, hash_array
+from raster_render import build_lut, colorize
+
+TILE_SIZE = 256
+MIN_ZOOM = 5
+
+def native_zoom(resolution):
+    """Smallest zoom whose tile pixels are finer than the raster grid"""
+    return int(math.ceil(math.log2(360.0 / (TILE_SIZE * resolution))))
+
+def lon_to_tile_x(lon, zoom):
+    """Fractional XYZ tile column containing a longitude"""
+    return (np.asarray(lon) + 180.0) / 360.0 * 2**zoom
+
+def lat_to_tile_y(lat, zoom):
+    """Fractional XYZ tile row containing a latitude (Web Mercator)"""
+    lat_rad = np.radians(lat)
+    return (1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * 2**zoom
+
+def tile_y_to_lat(y, zoom):
+    """Latitude of a fractional XYZ tile row (Web Mercator)"""
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y) / 2**zoom))))
+
+def downsample(data):
+    """Halve a raster's resolution by averaging 2x2 blocks, ignoring NaNs"""
+    rows, cols = (data.shape[0] // 2) * 2, (data.shape[1] // 2) * 2
+    blocks = data[:rows, :cols].reshape(rows // 2, 2, cols // 2, 2)
+    with np.errstate(invalid='ignore'):
+        valid = np.isfinite(blocks)
+        total = np.where(valid, blocks, 0).sum(axis=(1, 3))
+        return (total / valid.sum(axis=(1, 3))).astype(np.float32)
+
+def build_tile_pyramid(data, colormap, bounds, resolution, min_zoom=MIN_ZOOM, max_zoom=None):
+    """
+    Cut a raster into Web Mercator XYZ tiles stored under .cache/tiles/<key>
+    
+    Args:
+        data (np.ndarray): Raster with row 0 at bounds['south']
+        colormap (branca.colormap.LinearColormap): Colors and value range
+        bounds (dict): 'north', 'south', 'east' and 'west' edges of the raster
+        resolution (float): Grid spacing of the raster in degrees
+        min_zoom, max_zoom (int): Zoom levels to generate, max_zoom defaults to
+                                  the raster's native zoom; the browser upscales beyond it
+    
+    Returns:
+        str: Layer key identifying the pyramid on disk
+    """
+    if max_zoom is None:
+        max_zoom = native_zoom(resolution)
+    
+    # The sampled colors stand in for the colormap, so a palette change cuts new tiles
+    lut = build_lut(colormap)
+    key = '{}-{}-{}'.format(
+        hash_array(data)[:16],
+        hash_array(np.array([colormap.vmin, colormap.vmax, min_zoom, max_zoom], dtype=float))[:8],
+        hash_array(lut)[:8]
+    )
+    layer_dir = os.path.join(get_cache_dir('tiles'), key)
+    if os.path.exists(os.path.join(layer_dir, 'complete')):
+        return key
+    
+    # Overview levels: level n has 2**n times the base grid spacing
+    levels = [(resolution, np.asarray(data, dtype=np.float32))]
+    level_rgba = {}
+    
+    for zoom in range(min_zoom, max_zoom + 1):
+        # Use the coarsest overview that still has at least one cell per tile pixel
+        pixel_deg = 360.0 / (TILE_SIZE * 2**zoom)
+        while levels[-1][0] * 2 <= pixel_deg and min(levels[-1][1].shape) > 2:
+            levels.append((levels[-1][0] * 2, downsample(levels[-1][1])))
+        level = max(i for i, (res, _) in enumerate(levels) if res <= pixel_deg or i == 0)
+        level_res, level_data = levels[level]
+        if level not in level_rgba:
+            level_rgba[level] = colorize(level_data, lut, colormap.vmin, colormap.vmax)
+        rgba = level_rgba[level]
+        n_rows, n_cols = level_data.shape
+        
+        x_range = range(int(lon_to_tile_x(bounds['west'], zoom)),
+                        int(lon_to_tile_x(bounds['east'], zoom)) + 1)
+        y_range = range(int(lat_to_tile_y(bounds['north'], zoom)),
+                        int(lat_to_tile_y(bounds['south'], zoom)) + 1)
+        
+        for x in x_range:
+            # Raster column under each pixel center of the tile column
+            px_lon = (x + (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE) / 2**zoom * 360.0 - 180.0
+            cols = np.floor((px_lon - bounds['west']) / level_res).astype(np.intp)
+            col_ok = (cols >= 0) & (cols < n_cols)
+            
+            for y in y_range:
+                px_lat = tile_y_to_lat(y + (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE, zoom)
+                rows = np.floor((px_lat - bounds['south']) / level_res).astype(np.intp)
+                row_ok = (rows >= 0) & (rows < n_rows)
+                if not row_ok.any() or not col_ok.any():
+                    continue
+                
+                tile = rgba[np.clip(rows, 0, n_rows - 1)[:, None], np.clip(cols, 0, n_cols - 1)[None, :]]
+                tile[~(row_ok[:, None] & col_ok[None, :])] = 0
+                if not tile[..., 3].any():
+                    continue  # fully transparent, let the browser get a 404
+                
+                tile_dir = os.path.join(layer_dir, str(zoom), str(x))
+                os.makedirs(tile_dir, exist_ok=True)
+                with open(os.path.join(tile_dir, f'{y}.png'), 'wb') as f:
+                    f.write(write_png(tile))
+    
+    open(os.path.join(layer_dir, 'complete'), 'w').close()
+    return key
+
+class _TileRequestHandler(SimpleHTTPRequestHandler):
+    def end_headers(self):
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class TileServer:
+    """
+    Serves the on-disk tile pyramids over HTTP from a background thread, on
+    CLIMATE_APP_TILE_PORT or else a free port chosen by the OS so several
+    app processes on one host do not collide
+    """
+
+    def __init__(self, host='127.0.0.1', port=None):
+        if port is None:
+            port = int(os.environ.get('CLIMATE_APP_TILE_PORT', 0))
+        handler = partial(_TileRequestHandler, directory=get_cache_dir('tiles'))
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        """Public URL of the tile root, overridable for reverse proxies"""
+        return os.environ.get('CLIMATE_APP_TILE_URL', f'http://localhost:{self.port}').rstrip('/')
+
+    def tile_url(self, key):
+        """XYZ URL template for a layer built by build_tile_pyramid"""
+        return f'{self.base_url}/{key}/{{z}}/{{x}}/{{y}}.png'
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def tiles_reachable(request_host):
+    """
+    Whether a browser that reached the app at request_host (the Host header)
+    can load tiles: always behind CLIMATE_APP_TILE_URL, otherwise only on the
+    server host itself, since the tile server listens on the loopback address
+    """
+    if os.environ.get('CLIMATE_APP_TILE_URL'):
+        return True
+    hostname = (request_host or '').rsplit(':', 1)[0].strip('[]')
+    return hostname in ('localhost', '127.0.0.1', '::1')
+
+_tile_server = None
+_tile_server_lock = threading.Lock()
+
+def get_tile_server():
+    """Return the process-wide tile server, starting it on first use"""
+    global _tile_server
+    with _tile_server_lock:
+        if _tile_server is None:
+            _tile_server = TileServer()
+        return _tile_server
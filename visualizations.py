@@ -1,7 +1,50 @@
-import matplotlib.pyplot as plt
+from io import BytesIO
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 import numpy as np
 import pandas as pd
+from downsampling import downsample_series
+
+# Fixed seed for seaborn's bootstrapped confidence bands, so the same data
+# always renders the same image
+BOOTSTRAP_SEED = 0
+
+def create_figure(nrows=1, ncols=1, figsize=None):
+    """
+    Creates a figure on its own Agg canvas, outside pyplot's global figure
+    manager, so renders on concurrent session threads do not share state
+    and the figure is freed as soon as the caller drops it
+    
+    Args:
+        nrows (int): Number of subplot rows
+        ncols (int): Number of subplot columns
+        figsize (tuple, optional): Figure size in inches
+    
+    Returns:
+        tuple: (matplotlib.figure.Figure, axes)
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols)
+
+def figure_to_png(fig, dpi=100):
+    """
+    Renders a figure to PNG bytes and releases its artists
+    
+    Args:
+        fig (matplotlib.figure.Figure): Figure to render
+        dpi (int): Output resolution
+    
+    Returns:
+        bytes: PNG image data
+    """
+    buffer = BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=dpi)
+    finally:
+        fig.clear()
+    return buffer.getvalue()
 
 def plot_climate_timeseries(climate_data):
     """
@@ -17,22 +60,22 @@ def plot_climate_timeseries(climate_data):
         
     try:
         # Set up the figure with two subplots
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+        fig, (ax1, ax2) = create_figure(2, 1, figsize=(12, 8))
         fig.suptitle('Nepal Climate Trends Over Time', fontsize=16)
 
         # Temperature plot
-        sns.lineplot(data=climate_data, x='year', y='temperature', ax=ax1)
+        sns.lineplot(data=climate_data, x='year', y='temperature', ax=ax1, seed=BOOTSTRAP_SEED)
         ax1.set_title('Temperature Trends')
         ax1.set_xlabel('Year')
         ax1.set_ylabel('Temperature (°C)')
         
         # Precipitation plot
-        sns.lineplot(data=climate_data, x='year', y='precipitation', ax=ax2)
+        sns.lineplot(data=climate_data, x='year', y='precipitation', ax=ax2, seed=BOOTSTRAP_SEED)
         ax2.set_title('Precipitation Trends') 
         ax2.set_xlabel('Year')
         ax2.set_ylabel('Precipitation (mm)')
 
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
         
     except Exception as e:
@@ -53,7 +96,7 @@ def plot_seasonal_patterns(climate_data):
         
     try:
         # Set up the figure with two subplots
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+        fig, (ax1, ax2) = create_figure(2, 1, figsize=(12, 8))
         fig.suptitle('Nepal Seasonal Climate Patterns', fontsize=16)
 
         # Monthly temperature patterns
@@ -68,7 +111,7 @@ def plot_seasonal_patterns(climate_data):
         ax2.set_xlabel('Month') 
         ax2.set_ylabel('Precipitation (mm)')
 
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
         
     except Exception as e:
@@ -94,24 +137,24 @@ def plot_yearly_trend(climate_data):
         }).reset_index()
         
         # Create figure with two y-axes
-        fig, ax1 = plt.subplots(figsize=(12, 6))
+        fig, ax1 = create_figure(figsize=(12, 6))
         ax2 = ax1.twinx()
         
         # Plot temperature
         sns.regplot(data=yearly_data, x='year', y='temperature', ax=ax1, 
-                   scatter_kws={'alpha':0.5}, line_kws={'color': 'red'})
+                   scatter_kws={'alpha':0.5}, line_kws={'color': 'red'}, seed=BOOTSTRAP_SEED)
         ax1.set_xlabel('Year')
         ax1.set_ylabel('Temperature (°C)', color='red')
         ax1.tick_params(axis='y', labelcolor='red')
         
         # Plot precipitation
         sns.regplot(data=yearly_data, x='year', y='precipitation', ax=ax2,
-                   scatter_kws={'alpha':0.5}, line_kws={'color': 'blue'})
+                   scatter_kws={'alpha':0.5}, line_kws={'color': 'blue'}, seed=BOOTSTRAP_SEED)
         ax2.set_ylabel('Precipitation (mm)', color='blue')
         ax2.tick_params(axis='y', labelcolor='blue')
         
-        plt.title('Nepal Yearly Climate Trends')
-        plt.tight_layout()
+        ax1.set_title('Nepal Yearly Climate Trends')
+        fig.tight_layout()
         return fig
         
     except Exception as e:
@@ -135,7 +178,7 @@ def plot_actual_vs_predicted(y_true, y_pred):
         
     try:
         # Create figure with two subplots
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+        fig, (ax1, ax2) = create_figure(1, 2, figsize=(15, 6))
         
         # Temperature subplot
         ax1.scatter(y_true['temperature'], y_pred['temperature'], alpha=0.5)
@@ -155,7 +198,7 @@ def plot_actual_vs_predicted(y_true, y_pred):
         ax2.set_ylabel('Predicted Precipitation (mm)')
         ax2.set_title('Precipitation: Actual vs Predicted')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
         
     except Exception as e:
@@ -163,7 +206,7 @@ def plot_actual_vs_predicted(y_true, y_pred):
         return None
 def plot_prediction_history(history_temps, predicted_temps, history_precip, predicted_precip,
                           historical_monthly_temps=None, historical_monthly_precip=None,
-                          dates=None, rolling_window=12, show_metrics=True):
+                          dates=None, rolling_window=12, show_metrics=True, full_resolution=False):
     """
     Creates plots comparing historical and predicted climate data with historical monthly averages
     
@@ -177,6 +220,8 @@ def plot_prediction_history(history_temps, predicted_temps, history_precip, pred
         dates (array-like, optional): Dates/timestamps for x-axis
         rolling_window (int): Window size for rolling average, default 12 months
         show_metrics (bool): Whether to display error metrics
+        full_resolution (bool): Plot every point instead of an LTTB-downsampled
+                                series sized to the figure width
         
     Returns:
         matplotlib.figure.Figure: The generated figure object, or None if error occurs
@@ -193,25 +238,32 @@ def plot_prediction_history(history_temps, predicted_temps, history_precip, pred
             dates = np.arange(len(hist_temp))
             
         # Create figure with two subplots
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+        fig, (ax1, ax2) = create_figure(2, 1, figsize=(12, 10))
+        width_px = int(fig.get_figwidth() * fig.dpi)
+        
+        def plot_line(ax, x, y, *args, **kwargs):
+            # Statistics use the full series; only the drawn line is downsampled
+            if not full_resolution:
+                x, y = downsample_series(x, y, width_px)
+            ax.plot(x, y, *args, **kwargs)
             
         # Temperature plot
-        ax1.plot(dates, hist_temp, 'b-', label='Historical Temperature', alpha=0.7)
-        ax1.plot(dates, pred_temp, 'r-', label='Predicted Temperature', alpha=0.7)
+        plot_line(ax1, dates, hist_temp, 'b-', label='Historical Temperature', alpha=0.7)
+        plot_line(ax1, dates, pred_temp, 'r-', label='Predicted Temperature', alpha=0.7)
         
         # Add historical monthly temperature averages if provided
         if historical_monthly_temps is not None:
             months = pd.DatetimeIndex(dates).month if isinstance(dates, pd.DatetimeIndex) else np.ones(len(dates))
             monthly_avg = np.array(historical_monthly_temps)[months - 1]
-            ax1.plot(dates, monthly_avg, 'g--', label='Historical Monthly Average', alpha=0.5)
+            plot_line(ax1, dates, monthly_avg, 'g--', label='Historical Monthly Average', alpha=0.5)
         
         # Add rolling averages for temperature
         if rolling_window:
             hist_rolling = pd.Series(hist_temp).rolling(window=rolling_window).mean()
             pred_rolling = pd.Series(pred_temp).rolling(window=rolling_window).mean()
-            ax1.plot(dates, hist_rolling, 'b--', 
+            plot_line(ax1, dates, hist_rolling, 'b--', 
                     label=f'{rolling_window}-Period Rolling Avg (Historical)', alpha=0.5)
-            ax1.plot(dates, pred_rolling, 'r--', 
+            plot_line(ax1, dates, pred_rolling, 'r--', 
                     label=f'{rolling_window}-Period Rolling Avg (Predicted)', alpha=0.5)
         
         ax1.set_xlabel('Time Period')
@@ -229,22 +281,22 @@ def plot_prediction_history(history_temps, predicted_temps, history_precip, pred
                     verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
         
         # Precipitation plot
-        ax2.plot(dates, hist_precip, 'b-', label='Historical Precipitation', alpha=0.7)
-        ax2.plot(dates, pred_precip, 'r-', label='Predicted Precipitation', alpha=0.7)
+        plot_line(ax2, dates, hist_precip, 'b-', label='Historical Precipitation', alpha=0.7)
+        plot_line(ax2, dates, pred_precip, 'r-', label='Predicted Precipitation', alpha=0.7)
         
         # Add historical monthly precipitation averages if provided
         if historical_monthly_precip is not None:
             months = pd.DatetimeIndex(dates).month if isinstance(dates, pd.DatetimeIndex) else np.ones(len(dates))
             monthly_avg = np.array(historical_monthly_precip)[months - 1]
-            ax2.plot(dates, monthly_avg, 'g--', label='Historical Monthly Average', alpha=0.5)
+            plot_line(ax2, dates, monthly_avg, 'g--', label='Historical Monthly Average', alpha=0.5)
         
         # Add rolling averages for precipitation
         if rolling_window:
             hist_rolling = pd.Series(hist_precip).rolling(window=rolling_window).mean()
             pred_rolling = pd.Series(pred_precip).rolling(window=rolling_window).mean()
-            ax2.plot(dates, hist_rolling, 'b--',
+            plot_line(ax2, dates, hist_rolling, 'b--',
                     label=f'{rolling_window}-Period Rolling Avg (Historical)', alpha=0.5)
-            ax2.plot(dates, pred_rolling, 'r--',
+            plot_line(ax2, dates, pred_rolling, 'r--',
                     label=f'{rolling_window}-Period Rolling Avg (Predicted)', alpha=0.5)
         
         ax2.set_xlabel('Time Period')
@@ -261,7 +313,7 @@ def plot_prediction_history(history_temps, predicted_temps, history_precip, pred
             ax2.text(0.02, 0.98, metric_text, transform=ax2.transAxes,
                     verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
         
     except Exception as e: